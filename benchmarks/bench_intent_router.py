@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do roteador de intenções
+
+Compara o roteador pré-compilado (src/intent_router.py) com a cadeia de
+`any(word in msg_lower ...)` usada antes, em acurácia sobre o corpus
+rotulado (intent_corpus.json) e em mensagens classificadas por segundo:
+só a intenção e a intenção mais a detecção de pedido de análise, que o
+roteador entrega na mesma passada.
+
+As entradas com "origem": "baseline" foram rotuladas com a resposta da
+cadeia original (perguntas da documentação e do chat): a concordância
+nelas mostra regressões em relação ao comportamento anterior.
+
+Uso: python benchmarks/bench_intent_router.py [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.intent_router import intent_router
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_corpus.json')
+
+
+def legacy_intent(user_message):
+    """Cadeia de palavras-chave original de get_rule_based_response, reduzida à intenção"""
+    msg_lower = user_message.lower()
+    if any(word in msg_lower for word in ['oi', 'olá', 'hello', 'bom dia', 'boa tarde']):
+        return 'saudacao'
+    if 'por categoria' in msg_lower or ('categoria' in msg_lower and 'resolu' in msg_lower):
+        return 'resolucao_categoria'
+    if any(word in msg_lower for word in ['categoria', 'tipo', 'problema']):
+        return 'categorias'
+    if any(word in msg_lower for word in ['resolvido', 'resolvida', 'status', 'pendente', 'respondida']):
+        return 'status'
+    if any(word in msg_lower for word in ['funcionalidade', 'função', 'fazer', 'pode', 'ajuda', 'sistema', 'usar']):
+        return 'funcionalidades'
+    if any(word in msg_lower for word in ['situação', 'status', 'como está', 'resumo', 'geral']):
+        return 'situacao'
+    if any(word in msg_lower for word in ['melhorar', 'resolver', 'solução', 'como', 'recomendação', 'sugestão']):
+        return 'melhorias'
+    if any(word in msg_lower for word in ['analisar', 'relatório', 'gerar', 'pdf', 'completo']):
+        return 'relatorio'
+    return 'geral'
+
+
+def legacy_decision(user_message):
+    """O que invoke fazia por mensagem: varredura de análise mais a cadeia de intenções"""
+    analysis_keywords = ['analisar', 'relatório', 'gerar', 'pdf', 'email', 'envie', 'enviar', 'detalhado']
+    is_analysis_request = any(keyword in user_message.lower() for keyword in analysis_keywords)
+    return legacy_intent(user_message), is_analysis_request
+
+
+def router_intent(user_message):
+    return intent_router.route(user_message).intent
+
+
+def router_decision(user_message):
+    route = intent_router.route(user_message)
+    return route.intent, 'analise' in route.tags
+
+
+def evaluate(classify, corpus):
+    errors = [(item['message'], item['intent'], classify(item['message']))
+              for item in corpus if classify(item['message']) != item['intent']]
+    return 1 - len(errors) / len(corpus), errors
+
+
+def throughput(classify, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            classify(message)
+    elapsed = time.perf_counter() - start
+    return repeat * len(messages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='passadas sobre o corpus na medição de vazão')
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding='utf-8') as file:
+        corpus = json.load(file)
+    messages = [item['message'] for item in corpus]
+
+    print(f"Corpus: {len(corpus)} mensagens rotuladas\n")
+    print(f"{'Classificador':<22}{'Acurácia':>10}{'Msgs/s (intenção)':>20}{'Msgs/s (+ análise)':>20}")
+    results = {}
+    classifiers = [
+        ('cadeia any() original', legacy_intent, legacy_decision),
+        ('roteador compilado', router_intent, router_decision),
+    ]
+    for name, classify, decide in classifiers:
+        accuracy, errors = evaluate(classify, corpus)
+        intent_rate = throughput(classify, messages, args.repeat)
+        decision_rate = throughput(decide, messages, args.repeat)
+        results[name] = errors
+        print(f"{name:<22}{accuracy:>9.1%}{intent_rate:>20,.0f}{decision_rate:>20,.0f}")
+
+    baseline = [item for item in corpus if item.get('origem') == 'baseline']
+    if baseline:
+        accuracy, errors = evaluate(router_intent, baseline)
+        print(f"\nConcordância do roteador com a cadeia original: {accuracy:.1%} de {len(baseline)} mensagens")
+
+    for name, errors in results.items():
+        if errors:
+            print(f"\nErros de '{name}':")
+            for message, expected, got in errors:
+                print(f"   • {message!r}: esperado {expected}, obtido {got}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do pipeline de análise
+
+Gera dumps sintéticos (benchmarks/synthetic_data.py) de cada tamanho e mede,
+por etapa, o tempo e o pico de memória alocada (tracemalloc):
+  • load_json / load_cache: Analyzer.load_data lendo o JSON e o cache colunar;
+  • analyze: analyze_* e agregados por categoria;
+  • summary: generate_summary_text;
+  • search: primeira busca pelo chat (inclui a montagem do índice invertido);
+  • charts: create_charts sem cache;
+  • pdf: generate_pdf_report completo (gráficos incluídos);
+  • invoke_chat / invoke_report: invoke com Bedrock e SMTP simulados
+    (o relatório inclui o envio do e-mail pela fila).
+
+O resultado pode ser gravado em JSON (--output) e comparado com uma
+execução anterior (--baseline): sai com código 1 se alguma etapa ficar
+mais lenta ou usar mais memória além da tolerância.
+
+Uso: python benchmarks/bench_pipeline.py [--sizes 1000,100000,1000000] [--stages ...]
+                                         [--output ARQ.json] [--baseline ARQ.json] [--tolerance 0.3]
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import my_agent
+from src.analyzer import Analyzer
+from src.bedrock_client import ResilientBedrockClient
+from src.chart_cache import chart_cache
+from src.columnar_cache import write_sidecar
+from src.response_cache import response_cache
+from email_sender import EmailDeliveryQueue
+from stress_concurrency import RecordingSender
+from synthetic_data import write_dataset
+
+STAGES = ['load_json', 'load_cache', 'analyze', 'summary', 'search', 'charts', 'pdf', 'invoke_chat', 'invoke_report']
+
+# Diferenças abaixo destes limites são ruído, não regressão
+MIN_DELTA_SECONDS = 0.05
+MIN_DELTA_MB = 1.0
+
+
+class InstantBedrock:
+    """Bedrock simulado: responde na hora, sem rede"""
+
+    def invoke_model(self, modelId, body):
+        response = {'output': {'message': {'content': [{'text': 'Resposta simulada do modelo.'}]}},
+                    'usage': {'inputTokens': 300}}
+        return {'body': io.BytesIO(json.dumps(response).encode('utf-8'))}
+
+
+class StageTimer:
+    """Mede tempo e pico de memória alocada de cada etapa"""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    def run(self, stage, func):
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        result = {'seconds': round(elapsed, 4)}
+        if self.trace_memory:
+            result['peak_mb'] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+        self.results[stage] = result
+        return value
+
+
+def warm_up():
+    """Importa e inicializa matplotlib e ReportLab fora da medição (custo único por processo)"""
+    from reportlab.platypus import SimpleDocTemplate  # noqa: F401
+    from src.charts import render_chart
+
+    render_chart('status_bar', {'labels': ['a'], 'values': [1]},
+                 {'figsize': (2, 2), 'dpi': 50, 'title': 'aquecimento', 'colors': ['#3498db']})
+
+
+def bench_size(rows, stages, data_dir, timer, seed):
+    """Executa as etapas sobre um dump sintético de `rows` reclamações"""
+    path = os.path.join(data_dir, f"reclamacoes_sinteticas_{rows}_{seed}.json")
+    if not os.path.exists(path):
+        write_dataset(path, rows, seed=seed)
+
+    analyzer = Analyzer(path, compact=True, use_cache=False)
+    if 'load_json' in stages:
+        timer.run('load_json', analyzer.load_data)
+    else:
+        analyzer.load_data()
+
+    if 'load_cache' in stages:
+        # No modo compacto as descrições ficam fora do DataFrame; o cache guarda todas as colunas
+        write_sidecar(path, analyzer.df.assign(descricao=analyzer.get_descriptions()), analyzer.data['metadata'])
+        timer.run('load_cache', Analyzer(path, compact=True, use_cache=True).load_data)
+
+    if 'analyze' in stages:
+        timer.run('analyze', lambda: (analyzer.analyze_categories(), analyzer.analyze_status(),
+                                      analyzer.analyze_trends(), analyzer.get_top_issues(),
+                                      analyzer.get_status_by_category(), analyzer.get_resolution_by_category(),
+                                      analyzer.get_category_breakdown()))
+    if 'summary' in stages:
+        timer.run('summary', analyzer.generate_summary_text)
+    if 'search' in stages:
+        timer.run('search', lambda: analyzer.search_message('reclamações sobre PIX não encontrado em setembro'))
+    if 'charts' in stages:
+        timer.run('charts', lambda: analyzer.create_charts(use_cache=False))
+    if 'pdf' in stages:
+        chart_cache.clear()
+        timer.run('pdf', lambda: analyzer.generate_pdf_report(os.path.join(data_dir, f"relatorio_{rows}.pdf")))
+
+    if 'invoke_chat' in stages or 'invoke_report' in stages:
+        bench_invoke(path, stages, timer)
+
+
+def bench_invoke(path, stages, timer):
+    """invoke sobre o dump, com o Analyzer já carregado no processo"""
+    os.environ['RECLAMACOES_DATA_PATH'] = path
+    my_agent.load_context({})
+    response_cache.clear()
+
+    if 'invoke_chat' in stages:
+        timer.run('invoke_chat', lambda: my_agent.invoke({'prompt': 'Quais categorias têm mais reclamações?'}))
+
+    if 'invoke_report' in stages:
+        chart_cache.clear()
+        queue = my_agent.get_delivery_queue()
+
+        def report():
+            result = my_agent.invoke({'prompt': 'Gerar relatório completo', 'email': 'equipe@example.com'})
+            return result, queue.wait(result['email_delivery_id'], timeout=60)
+
+        result, delivery = timer.run('invoke_report', report)
+        # Uma entrega com erro mediria a falha imediata, não o envio pela fila
+        if not delivery or delivery['status'] != 'enviado':
+            raise RuntimeError(f"invoke_report: e-mail não enviado ({(delivery or {}).get('result')})")
+        # O relatório vai para results/ do projeto: não deixar arquivos do benchmark para trás
+        if result.get('pdf_filename') and os.path.exists(result['pdf_filename']):
+            os.remove(result['pdf_filename'])
+
+
+def compare(report, baseline, tolerance):
+    """Etapas que pioraram em relação à execução de referência"""
+    regressions = []
+    for size, stages in report['results'].items():
+        for stage, result in stages.items():
+            previous = baseline.get('results', {}).get(size, {}).get(stage)
+            if not previous:
+                continue
+            for metric, floor in (('seconds', MIN_DELTA_SECONDS), ('peak_mb', MIN_DELTA_MB)):
+                if metric not in result or metric not in previous:
+                    continue
+                before, after = previous[metric], result[metric]
+                if after > before * (1 + tolerance) and after - before > floor:
+                    regressions.append(f"{size} linhas, {stage}: {metric} {before} -> {after}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='quantidades de reclamações')
+    parser.add_argument('--stages', default=','.join(STAGES), help='etapas a medir')
+    parser.add_argument('--data-dir', help='onde guardar (e reaproveitar) os dumps; padrão: temporário')
+    parser.add_argument('--seed', type=int, default=42, help='semente dos dados sintéticos')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='desliga o tracemalloc (tempos sem o custo do rastreamento)')
+    parser.add_argument('--output', help='grava o resultado em JSON neste arquivo')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='piora relativa aceita (0.3 = 30%%)')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"etapas desconhecidas: {', '.join(sorted(unknown))}")
+
+    # Nada sai da máquina: Bedrock responde na hora e os e-mails só são registrados
+    my_agent.bedrock_client = ResilientBedrockClient(client=InstantBedrock())
+    queue = EmailDeliveryQueue(sender=RecordingSender(), batch_window=0)
+    my_agent.get_delivery_queue = lambda: queue
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='bench_pipeline_')
+    trace_memory = not args.no_memory
+    if {'charts', 'pdf', 'invoke_report'} & set(stages):
+        warm_up()
+    if trace_memory:
+        tracemalloc.start()
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'tracemalloc': trace_memory,
+            'seed': args.seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': {},
+    }
+    try:
+        for rows in sizes:
+            timer = StageTimer(trace_memory)
+            bench_size(rows, stages, data_dir, timer, args.seed)
+            report['results'][str(rows)] = timer.results
+            if not args.json:
+                print(f"{rows:,} reclamações")
+                for stage, result in timer.results.items():
+                    memory = f"{result['peak_mb']:>10.1f} MB" if 'peak_mb' in result else ''
+                    print(f"   {stage:<15}{result['seconds'] * 1000:>12.1f} ms{memory}")
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline.get('meta', {}).get('tracemalloc') != trace_memory:
+            sys.exit("Referência medida com outra configuração de tracemalloc; compare execuções equivalentes")
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"✗ regressão: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark de partida (cold start) dos pontos de entrada
+
+Importa cada módulo em um processo novo com `python -X importtime`, mede o
+tempo acumulado de importação e verifica:
+  • orçamento de tempo (mediana das execuções) por módulo;
+  • que a pilha de relatórios (matplotlib, ReportLab) e o seaborn não são
+    carregados só para responder perguntas.
+
+Sai com código 1 se algum limite for violado, para uso em CI.
+
+Uso: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS] [--top N] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento de importação (ms) de cada ponto de entrada
+BUDGETS_MS = {
+    'src.my_agent': 1300,
+    'web_chat': 1500,
+}
+
+# Módulos que só podem ser carregados quando um relatório é gerado
+FORBIDDEN = ('matplotlib', 'reportlab', 'seaborn')
+
+
+def parse_importtime(stderr):
+    """Linhas de -X importtime como (módulo, self_us, cumulativo_us, profundidade)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        self_us, cumulative_us, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(raw_name) - len(raw_name.lstrip(' ')) - 1) // 2
+        rows.append((raw_name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def direct_imports(rows, module):
+    """Importações feitas diretamente pelo módulo, como (nome, ms acumulados)
+
+    O importtime lista cada módulo depois das suas dependências, então os
+    filhos diretos são as linhas de profundidade 1 logo antes dele.
+    """
+    index = next(i for i, (name, _, _, depth) in enumerate(rows) if name == module and depth == 0)
+    children = []
+    for name, _, cumulative, depth in reversed(rows[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative / 1000))
+    return children
+
+
+def measure(module):
+    """Importa o módulo num processo novo; retorna (linhas do importtime, tempo de parede em s)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='execuções por módulo (vale a mediana)')
+    parser.add_argument('--budget-ms', type=float, help='orçamento único para todos os módulos')
+    parser.add_argument('--top', type=int, default=8, help='dependências mais pesadas a listar')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    report = {}
+    failed = False
+    for module, default_budget in BUDGETS_MS.items():
+        budget = args.budget_ms or default_budget
+        import_ms, wall_ms = [], []
+        for _ in range(args.runs):
+            rows, elapsed = measure(module)
+            total = next(cumulative for name, _, cumulative, depth in rows if name == module and depth == 0)
+            import_ms.append(total / 1000)
+            wall_ms.append(elapsed * 1000)
+
+        loaded = {name.split('.')[0] for name, _, _, _ in rows}
+        forbidden = sorted(set(FORBIDDEN) & loaded)
+        heaviest = sorted(direct_imports(rows, module), key=lambda item: item[1], reverse=True)[:args.top]
+        median = statistics.median(import_ms)
+        ok = median <= budget and not forbidden
+        failed = failed or not ok
+        report[module] = {
+            'import_ms_median': round(median, 1),
+            'import_ms_min': round(min(import_ms), 1),
+            'process_ms_median': round(statistics.median(wall_ms), 1),
+            'budget_ms': budget,
+            'forbidden_loaded': forbidden,
+            'heaviest': [{'module': name, 'ms': round(ms, 1)} for name, ms in heaviest],
+            'ok': ok,
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        for module, result in report.items():
+            status = 'OK' if result['ok'] else 'FALHOU'
+            print(f"{module}: {result['import_ms_median']:.0f} ms de importação "
+                  f"(mín. {result['import_ms_min']:.0f}, processo {result['process_ms_median']:.0f} ms, "
+                  f"orçamento {result['budget_ms']:.0f} ms) [{status}]")
+            if result['forbidden_loaded']:
+                print(f"   ✗ carregados sem necessidade: {', '.join(result['forbidden_loaded'])}")
+            for item in result['heaviest']:
+                print(f"   • {item['module']:<28}{item['ms']:>8.0f} ms")
+            print()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Teste de carga: servidor Flask (web_chat.py) x servidor ASGI (web_chat_asgi.py)
+
+Sobe cada servidor num processo próprio, com um Bedrock simulado que
+demora `--latency` segundos por resposta, e dispara sessões simultâneas:
+  • chat: POST /api/chat com perguntas distintas (sem acertos no cache);
+  • download: GET /download/<pdf> de um relatório já gerado.
+
+Para cada servidor e cenário mostra requisições por segundo, latências
+(p50/p95/máx.), erros e o pico de threads e de memória do processo. O
+Flask abre uma thread por conexão; o ASGI só ocupa threads com as chamadas
+em andamento ao Bedrock (até --bedrock-workers) e as demais sessões
+esperam como corrotinas.
+
+Uso: python benchmarks/load_test_web.py [--concurrency N] [--requests N] [--latency S]
+                                        [--servers flask,asgi] [--scenarios chat,download] [--json]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HOST = '127.0.0.1'
+PORTS = {'flask': 5601, 'asgi': 5602}
+
+
+class SlowBedrock:
+    """Bedrock simulado: responde depois de `latency` segundos, como o modelo real
+
+    Atende no máximo `max_concurrent` chamadas por vez, como o pool de
+    conexões do cliente; as demais esperam a vez.
+    """
+
+    def __init__(self, latency, max_concurrent):
+        self.latency = latency
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def invoke_model(self, modelId, body):
+        with self._slots:
+            time.sleep(self.latency)
+        response = {'output': {'message': {'content': [{'text': 'Resposta simulada do modelo.'}]}},
+                    'usage': {'inputTokens': 300}}
+        return {'body': io.BytesIO(json.dumps(response).encode('utf-8'))}
+
+
+def serve(kind, port, latency):
+    """Modo servidor (processo filho): sobe o servidor pedido com o Bedrock simulado"""
+    from src import my_agent
+    from src.bedrock_client import ResilientBedrockClient
+
+    slow_bedrock = SlowBedrock(latency, int(os.environ['BEDROCK_MAX_POOL_CONNECTIONS']))
+    my_agent.bedrock_client = ResilientBedrockClient(client=slow_bedrock)
+    if kind == 'flask':
+        import web_chat
+        web_chat.app.run(host=HOST, port=port, threaded=True)
+    else:
+        import uvicorn
+        import web_chat_asgi
+        uvicorn.run(web_chat_asgi.app, host=HOST, port=port, log_level='warning')
+
+
+def start_server(kind, latency, bedrock_workers):
+    port = PORTS[kind]
+    # Mesmo limite de chamadas simultâneas ao Bedrock no pool de conexões e no executor assíncrono
+    env = dict(os.environ, BEDROCK_MAX_POOL_CONNECTIONS=str(bedrock_workers),
+               BEDROCK_ASYNC_WORKERS=str(bedrock_workers))
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', kind,
+                                '--port', str(port), '--latency', str(latency)],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"Servidor {kind} terminou ao iniciar")
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Servidor {kind} não respondeu em 60 s")
+
+
+def process_usage(pid):
+    """Threads e memória residente (MB) do processo, lidos de /proc (só Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            fields = dict(line.split(':', 1) for line in file if ':' in line)
+        return int(fields['Threads']), int(fields['VmRSS'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+async def http_request(port, method, path, body=None):
+    """Requisição HTTP/1.1 mínima; retorna (status, bytes recebidos)"""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    data = json.dumps(body).encode('utf-8') if body is not None else b''
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {HOST}:{port}\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n")
+    writer.write(head.encode('ascii') + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b' ', 2)[1]) if response else 0
+    return status, len(response)
+
+
+async def run_scenario(port, pid, scenario, concurrency, requests, pdf_name):
+    latencies, errors = [], 0
+    peak_threads, peak_rss = 0, 0.0
+
+    def make_request(session, number):
+        if scenario == 'chat':
+            message = f"Como melhorar o atendimento na sessão {session} pergunta {number}?"
+            return 'POST', '/api/chat', {'message': message}
+        return 'GET', f"/download/{pdf_name}", None
+
+    async def session(index):
+        nonlocal errors
+        for number in range(requests):
+            method, path, body = make_request(index, number)
+            start = time.perf_counter()
+            try:
+                status, _ = await http_request(port, method, path, body)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    async def monitor():
+        nonlocal peak_threads, peak_rss
+        while True:
+            threads, rss = process_usage(pid)
+            if threads is not None:
+                peak_threads, peak_rss = max(peak_threads, threads), max(peak_rss, rss)
+            await asyncio.sleep(0.05)
+
+    watcher = asyncio.create_task(monitor())
+    start = time.perf_counter()
+    await asyncio.gather(*(session(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    watcher.cancel()
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(ordered) * 1000, 1),
+        'p95_ms': round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1),
+        'peak_threads': peak_threads or None,
+        'peak_rss_mb': round(peak_rss, 1) or None,
+    }
+
+
+def prepare_report():
+    """Gera (ou reaproveita) o PDF usado no cenário de download"""
+    from src.my_agent import load_context
+
+    analyzer, _ = load_context({})
+    if analyzer is None:
+        sys.exit("Dados de reclamações não encontrados")
+    return os.path.basename(analyzer.get_or_generate_pdf_report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=200, help='sessões simultâneas')
+    parser.add_argument('--requests', type=int, default=3, help='requisições por sessão')
+    parser.add_argument('--latency', type=float, default=0.5, help='latência simulada do Bedrock (s)')
+    parser.add_argument('--bedrock-workers', type=int, default=64,
+                        help='chamadas simultâneas ao Bedrock (pool e executor assíncrono)')
+    parser.add_argument('--servers', default='flask,asgi', help='servidores a comparar')
+    parser.add_argument('--scenarios', default='chat,download', help='cenários a executar')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    parser.add_argument('--serve', choices=sorted(PORTS), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.latency)
+        return
+
+    scenarios = args.scenarios.split(',')
+    pdf_name = prepare_report() if 'download' in scenarios else None
+
+    report = {}
+    for kind in args.servers.split(','):
+        process, port = start_server(kind, args.latency, args.bedrock_workers)
+        try:
+            report[kind] = {scenario: asyncio.run(run_scenario(port, process.pid, scenario, args.concurrency,
+                                                               args.requests, pdf_name))
+                            for scenario in scenarios}
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.concurrency} sessões x {args.requests} requisições, Bedrock simulado com {args.latency:.2f} s "
+          f"e até {args.bedrock_workers} chamadas simultâneas\n")
+    print(f"{'Servidor':<10}{'Cenário':<10}{'Req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'máx. ms':>10}"
+          f"{'Erros':>7}{'Threads':>9}{'RSS MB':>8}")
+    for kind, scenarios_report in report.items():
+        for scenario, result in scenarios_report.items():
+            print(f"{kind:<10}{scenario:<10}{result['rps']:>8.1f}{result['p50_ms']:>10.0f}{result['p95_ms']:>10.0f}"
+                  f"{result['max_ms']:>10.0f}{result['errors']:>7}{result['peak_threads'] or '-':>9}"
+                  f"{result['peak_rss_mb'] or '-':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Teste de estresse de concorrência do agente
+
+Executa as mesmas requisições em série e depois em paralelo (várias
+threads sobre o mesmo Analyzer compartilhado) e compara as saídas:
+  • invoke: perguntas de chat e pedidos de relatório (PDF e fila de e-mail);
+  • create_charts: gráficos renderizados sem cache, comparados byte a byte;
+  • append_records: lotes anexados em paralelo, enquanto outras threads
+    consultam os agregados, devem chegar às mesmas contagens da versão serial;
+  • lotes parciais: reclamação sem descrição entra alinhada às descrições e
+    à busca; lote sem campo obrigatório é recusado sem mexer nas contagens.
+
+O Bedrock fica desligado (respostas por regras) e os e-mails vão para um
+remetente falso, então nada sai da máquina. Sai com código 1 se alguma
+saída paralela divergir da serial.
+
+Uso: python benchmarks/stress_concurrency.py [--threads N] [--repeat N] [--batches N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import my_agent
+from src.analyzer import Analyzer
+from src.partitions import resolve_partitions
+from src.response_cache import response_cache
+from email_sender import EmailDeliveryQueue
+
+PAYLOADS = [
+    {'prompt': 'Olá, tudo bem?'},
+    {'prompt': 'Quais são as categorias de reclamação?'},
+    {'prompt': 'Quantas reclamações estão pendentes?'},
+    {'prompt': 'Qual a taxa de resolução por categoria?'},
+    {'prompt': 'Como está a situação geral?'},
+    {'prompt': 'Como melhorar o atendimento?'},
+    {'prompt': 'Gerar relatório completo e enviar para equipe@example.com'},
+]
+
+# Campos que mudam a cada chamada mesmo com os mesmos dados
+VOLATILE_FIELDS = {'email_delivery_id', 'email_status_url'}
+
+
+class RecordingSender:
+    """Remetente falso com a interface que a fila usa: só registra as entregas
+
+    As credenciais fictícias levam a fila pelo caminho SMTP de verdade
+    (lotes e tentativas), parando no `deliver`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.deliveries = []
+
+    def resolve_credentials(self, sender_email=None, sender_password=None):
+        return sender_email or 'stress@example.com', sender_password or 'senha'
+
+    def deliver(self, pdf_path, summary_text, recipients, sender_email=None, sender_password=None):
+        with self._lock:
+            self.deliveries.append((pdf_path, tuple(recipients)))
+
+    def send_report_email(self, pdf_path, summary_text, recipient_email, sender_email=None, sender_password=None):
+        return {"success": False, "error": "envio direto não esperado no teste"}
+
+    def save_fallback(self, pdf_path, summary_text, recipient_email, error):
+        return {"success": False, "error": f"Erro no envio: {error}"}
+
+
+def normalize(result):
+    """Saída comparável: sem campos voláteis e com chaves ordenadas"""
+    if isinstance(result, dict):
+        return json.dumps({key: value for key, value in result.items() if key not in VOLATILE_FIELDS},
+                          sort_keys=True, ensure_ascii=False, default=str)
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
+def run_parallel(tasks, threads):
+    """Executa (rótulo, função) em paralelo; retorna [(rótulo, resultado)] e o tempo em s"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [(label, executor.submit(task)) for label, task in tasks]
+        results = [(label, future.result()) for label, future in futures]
+    return results, time.perf_counter() - start
+
+
+def stress_invoke(threads, repeat, queue, sender):
+    """Respostas de invoke em paralelo iguais às da execução serial, com os e-mails entregues"""
+    response_cache.clear()
+    start = time.perf_counter()
+    serial = [my_agent.invoke(dict(payload)) for payload in PAYLOADS]
+    serial_time = time.perf_counter() - start
+    expected = {index: normalize(result) for index, result in enumerate(serial)}
+
+    # Sem o PDF em disco, as threads paralelas disputam a geração do mesmo relatório
+    response_cache.clear()
+    for result in serial:
+        if isinstance(result, dict) and result.get('pdf_filename') and os.path.exists(result['pdf_filename']):
+            os.remove(result['pdf_filename'])
+    tasks = [(index, lambda payload=payload: my_agent.invoke(dict(payload)))
+             for _ in range(repeat) for index, payload in enumerate(PAYLOADS)]
+    random.shuffle(tasks)
+    results, parallel_time = run_parallel(tasks, threads)
+
+    mismatches = [PAYLOADS[index]['prompt'] for index, result in results if normalize(result) != expected[index]]
+
+    # Cada pedido de relatório tem de terminar enviado e registrado pelo remetente falso
+    outputs = serial + [result for _, result in results]
+    delivery_ids = [result['email_delivery_id'] for result in outputs
+                    if isinstance(result, dict) and result.get('email_delivery_id')]
+    expected_emails = sum(1 for payload in PAYLOADS if '@' in payload['prompt']) * (repeat + 1)
+    if len(delivery_ids) != expected_emails:
+        mismatches.append(f"e-mails agendados: {len(delivery_ids)} de {expected_emails}")
+    for delivery_id in delivery_ids:
+        delivery = queue.wait(delivery_id, timeout=60)
+        if not delivery or delivery['status'] != 'enviado':
+            mismatches.append(f"e-mail {delivery['status'] if delivery else 'perdido'}: "
+                              f"{(delivery or {}).get('result')}")
+    recorded = sum(len(recipients) for _, recipients in sender.deliveries)
+    if delivery_ids and not recorded:
+        mismatches.append("nenhuma entrega registrada pelo remetente")
+
+    return {
+        'calls': len(tasks),
+        'emails': len(delivery_ids),
+        'smtp_batches': len(sender.deliveries),
+        'serial_s': round(serial_time, 3),
+        'parallel_s': round(parallel_time, 3),
+        'mismatches': sorted(set(mismatches)),
+    }
+
+
+def stress_charts(analyzer, threads, repeat):
+    """Gráficos renderizados em paralelo idênticos aos renderizados em série"""
+    expected = analyzer.create_charts(use_cache=False)
+    tasks = [('charts', lambda: analyzer.create_charts(use_cache=False)) for _ in range(repeat)]
+    results, parallel_time = run_parallel(tasks, threads)
+    mismatches = sum(1 for _, charts in results if charts != expected)
+    return {'renders': len(tasks), 'parallel_s': round(parallel_time, 3), 'mismatches': mismatches}
+
+
+def aggregates_of(analyzer):
+    return normalize({
+        'categorias': analyzer.analyze_categories(),
+        'status': analyzer.analyze_status(),
+        'resolucao': analyzer.get_resolution_by_category(),
+        'top_issues': analyzer.get_top_issues(),
+        'fingerprint': analyzer.fingerprint(),
+        'linhas': len(analyzer.df),
+        'descricoes': len(analyzer.get_descriptions()),
+    })
+
+
+def stress_append(data_path, threads, batches):
+    """Lotes anexados em paralelo, com leituras simultâneas, chegam aos agregados da versão serial"""
+    # Lotes copiados do primeiro dump, com ids novos
+    with open(resolve_partitions(data_path)[0], encoding='utf-8') as file:
+        records = json.load(file)['reclamacoes']
+    batch_size = max(1, len(records) // 10)
+    deltas = [[dict(record, id=f"stress-{b}-{i}") for i, record in enumerate(records[:batch_size])]
+              for b in range(batches)]
+
+    serial = Analyzer(data_path, compact=True, use_cache=False)
+    serial.load_data()
+    for delta in deltas:
+        serial.append_records(delta)
+    expected = aggregates_of(serial)
+
+    shared = Analyzer(data_path, compact=True, use_cache=False)
+    shared.load_data()
+    tasks = [('append', lambda delta=delta: shared.append_records(delta)) for delta in deltas]
+    # Leituras intercaladas com os anexos: forçam cálculo e consolidação no meio do caminho
+    tasks += [('read', lambda: (shared.analyze_categories(), shared.fingerprint(), len(shared.df)))
+              for _ in range(batches)]
+    random.shuffle(tasks)
+    _, parallel_time = run_parallel(tasks, threads)
+
+    return {
+        'batches': batches,
+        'parallel_s': round(parallel_time, 3),
+        'mismatches': 0 if aggregates_of(shared) == expected else 1,
+    }
+
+
+def check_partial(data_path):
+    """Reclamações incompletas não desalinham DataFrame, descrições, contagens e busca"""
+    with open(resolve_partitions(data_path)[0], encoding='utf-8') as file:
+        record = json.load(file)['reclamacoes'][0]
+    problems = []
+
+    for compact in (True, False):
+        analyzer = Analyzer(data_path, compact=compact, use_cache=False)
+        analyzer.load_data()
+        analyzer.search('pix')
+        before = sum(item['count'] for item in analyzer.analyze_categories().values())
+
+        # Data mais recente que as do dump: a reclamação parcial aparece entre as amostras da busca
+        partial = {key: value for key, value in record.items() if key != 'descricao'}
+        partial['data'] = '2099-12-31'
+        if not analyzer.append_records([dict(partial, id='parcial-1')]):
+            problems.append(f"compact={compact}: lote sem descrição recusado")
+        invalid = {key: value for key, value in record.items() if key != 'categoria'}
+        if analyzer.append_records([dict(record, id='parcial-2'), dict(invalid, id='parcial-3')]):
+            problems.append(f"compact={compact}: lote sem categoria aceito")
+
+        rows = len(analyzer.df)
+        counted = sum(item['count'] for item in analyzer.analyze_categories().values())
+        if counted != before + 1 or counted != rows:
+            problems.append(f"compact={compact}: contagens {counted} para {rows} linhas")
+        if len(analyzer.get_descriptions()) != rows:
+            problems.append(f"compact={compact}: {len(analyzer.get_descriptions())} descrições para {rows} linhas")
+        try:
+            analyzer.search(record['titulo'])
+        except Exception as e:
+            problems.append(f"compact={compact}: busca falhou ({e!r})")
+
+    return {'checks': 2, 'mismatches': problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8, help='threads concorrentes')
+    parser.add_argument('--repeat', type=int, default=5, help='repetições de cada requisição')
+    parser.add_argument('--batches', type=int, default=20, help='lotes anexados no teste de append')
+    parser.add_argument('--seed', type=int, default=42, help='semente da ordem das tarefas')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    # Respostas por regras e e-mails só registrados: o teste não depende de rede
+    my_agent.bedrock_client = None
+    sender = RecordingSender()
+    queue = EmailDeliveryQueue(sender=sender, batch_window=0)
+    my_agent.get_delivery_queue = lambda: queue
+
+    data_path = my_agent.get_data_path()
+    analyzer, _ = my_agent.load_context({})
+    if analyzer is None:
+        sys.exit(f"Dados não encontrados em {data_path}")
+
+    report = {
+        'invoke': stress_invoke(args.threads, args.repeat, queue, sender),
+        'charts': stress_charts(analyzer, args.threads, args.repeat),
+        'append': stress_append(data_path, args.threads, args.batches),
+        'partial': check_partial(data_path),
+    }
+
+    failed = False
+    for name, result in report.items():
+        mismatches = result['mismatches']
+        ok = not mismatches
+        failed = failed or not ok
+        details = ', '.join(f"{key}={value}" for key, value in result.items() if key != 'mismatches')
+        print(f"{name:<8}{'OK' if ok else 'DIVERGIU':<10}{details}")
+        if isinstance(mismatches, list):
+            for prompt in mismatches:
+                print(f"   ✗ {prompt}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
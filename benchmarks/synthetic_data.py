@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Gerador de reclamações sintéticas no formato de data/reclamacoes_*.json
+
+Produz {"metadata": {...}, "reclamacoes": [...]} com os mesmos campos do
+dump de exemplo (data, titulo, descricao, status, categoria). Quantidade
+de registros, concentração das categorias e dos status e período são
+configuráveis; a mesma semente gera sempre o mesmo arquivo.
+
+A concentração segue uma lei de Zipf: com skew 0 os valores são
+equiprováveis e, quanto maior o skew, mais os primeiros da lista dominam.
+
+Uso: python benchmarks/synthetic_data.py SAIDA.json [--rows N] [--category-skew S]
+                                         [--status-skew S] [--start AAAA-MM-DD] [--days N] [--seed N]
+"""
+
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Títulos por categoria, na ordem usada pelo skew (a primeira é a mais frequente)
+TITLES = {
+    'App': ['App trava na tela de transferência', 'App não carrega meu extrato', 'App não reconhece biometria',
+            'App apresenta erro na autenticação', 'Aplicativo trava na inicialização',
+            'Aplicativo fecha sozinho ao abrir', 'Atualização deixou o app lento',
+            'Notificações do app não funcionam', 'Tela de login do app travada',
+            'Erro ao confirmar operação pelo app'],
+    'Cartão': ['Cobrança indevida no cartão', 'Erro na fatura do cartão', 'Cartão de crédito bloqueado sem aviso',
+               'Dificuldade para alterar limite do cartão', 'Problemas com cartão virtual'],
+    'Conta': ['Depósito não creditado na conta', 'Transferência TED não realizada', 'Conta bloqueada sem motivo',
+              'Erros no extrato da conta', 'Problema no débito automático'],
+    'Cobrança': ['Cobrança indevida na conta', 'Cobrança de tarifa indevida', 'Cobrança de serviço não contratado',
+                 'Débito em duplicidade na fatura', 'Empréstimo descontado sem autorização'],
+    'PIX': ['Chave PIX não encontrada', 'Transferência via PIX falha', 'PIX não funciona no app',
+            'Erro ao cadastrar chave PIX', 'PIX agendado não foi realizado'],
+    'Atendimento': ['Demora no atendimento telefônico', 'Fila de atendimento enorme',
+                    'Atendente não solucionou o problema', 'Atendimento no chat não resolve nada',
+                    'Agência sem pessoal suficiente'],
+    'Outros': ['Site institucional apresenta erro', 'Erro no agendamento de serviços',
+               'Notificação enviada incorretamente', 'Problema com aviso de cobrança',
+               'Problema com comunicação por email'],
+}
+
+# Complementos opcionais do título ('' = título sem complemento)
+TITLE_SUFFIXES = ['', '', '', ' (desde ontem)', ' (essa semana)', ' (intermitente)', ' (após atualização)']
+
+DESCRIPTIONS = [
+    'O problema está atrapalhando meu uso diário do serviço.',
+    'Preciso de uma resposta urgente, já que afetou uma transação.',
+    'Foi debitado um valor que não reconheço na minha conta.',
+    'Erro intermitente: às vezes funciona, às vezes não.',
+    'A funcionalidade que costumava funcionar parou após a última atualização.',
+    'Já reinstalei o aplicativo e limpei o cache, mas persiste o problema.',
+    'O atendimento não conseguiu resolver e me passou informações conflitantes.',
+    'Não recebi nenhuma comunicação sobre isso e preciso de uma solução.',
+    'Espero que o banco analise e retorne com uma solução.',
+]
+
+# Segunda frase opcional da descrição
+FOLLOW_UPS = ['', ' Entrei em contato com o suporte e não tive retorno.',
+              ' Isso me causou prejuízo e quero estorno.',
+              ' Já tentei resolver pelo app e pela agência sem sucesso.',
+              ' Por favor, analisem e informem o que aconteceu.']
+
+STATUSES = ['Não respondida', 'Respondida', 'Não resolvido', 'Resolvido']
+
+# Registros montados por vez ao gravar o arquivo (limita a memória do gerador)
+WRITE_BATCH = 100_000
+
+
+def zipf_weights(count, skew):
+    """Probabilidades decrescentes de Zipf; skew 0 = distribuição uniforme"""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+def _json_strings(values):
+    return np.array([json.dumps(value, ensure_ascii=False) for value in values], dtype=object)
+
+
+class ComplaintGenerator:
+    """Sorteia reclamações com a distribuição configurada, em lotes vetorizados"""
+
+    def __init__(self, category_skew=1.0, status_skew=0.5, start='2025-09-01', days=30, seed=42):
+        self.rng = np.random.default_rng(seed)
+        self.categories = list(TITLES)
+        self.category_weights = zipf_weights(len(self.categories), category_skew)
+        self.status_weights = zipf_weights(len(STATUSES), status_skew)
+        self.start = date.fromisoformat(start) if isinstance(start, str) else start
+        self.days = max(1, int(days))
+
+        # Textos já serializados em JSON: gravar 1M de registros é só concatenar strings
+        self._titles = [_json_strings(title + suffix for title in TITLES[category] for suffix in TITLE_SUFFIXES)
+                        for category in self.categories]
+        self._descriptions = _json_strings(text + follow_up for text in DESCRIPTIONS for follow_up in FOLLOW_UPS)
+        self._statuses = _json_strings(STATUSES)
+        self._category_names = _json_strings(self.categories)
+        self._dates = _json_strings((self.start + timedelta(days=offset)).isoformat() for offset in range(self.days))
+
+    def json_records(self, rows):
+        """Gera `rows` reclamações, cada uma já como texto JSON"""
+        category = self.rng.choice(len(self.categories), size=rows, p=self.category_weights)
+        status = self.rng.choice(len(STATUSES), size=rows, p=self.status_weights)
+        day = self.rng.integers(0, self.days, size=rows)
+        description = self.rng.integers(0, len(self._descriptions), size=rows)
+        title_pick = self.rng.random(rows)
+
+        titles = np.empty(rows, dtype=object)
+        for index, options in enumerate(self._titles):
+            mask = category == index
+            titles[mask] = options[(title_pick[mask] * len(options)).astype(np.int64)]
+
+        for values in zip(self._dates[day], titles, self._descriptions[description],
+                          self._statuses[status], self._category_names[category]):
+            yield '{"data": %s, "titulo": %s, "descricao": %s, "status": %s, "categoria": %s}' % values
+
+    def metadata(self, rows):
+        return {
+            'total_reclamacoes': rows,
+            'data_extracao': datetime.combine(self.start + timedelta(days=self.days), datetime.min.time()).isoformat(),
+            'fonte': 'Reclame Aqui - Sicredi (sintético)',
+        }
+
+
+def write_dataset(path, rows, **options):
+    """Grava um dump sintético com `rows` reclamações; retorna o caminho"""
+    generator = ComplaintGenerator(**options)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('{"metadata": %s, "reclamacoes": [' % json.dumps(generator.metadata(rows), ensure_ascii=False))
+        written = 0
+        while written < rows:
+            batch = min(WRITE_BATCH, rows - written)
+            file.write((',\n' if written else '\n') + ',\n'.join(generator.json_records(batch)))
+            written += batch
+        file.write('\n]}\n')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='arquivo JSON de saída')
+    parser.add_argument('--rows', type=int, default=1000, help='quantidade de reclamações')
+    parser.add_argument('--category-skew', type=float, default=1.0, help='concentração das categorias (0 = uniforme)')
+    parser.add_argument('--status-skew', type=float, default=0.5, help='concentração dos status (0 = uniforme)')
+    parser.add_argument('--start', default='2025-09-01', help='primeiro dia do período')
+    parser.add_argument('--days', type=int, default=30, help='dias cobertos pelas reclamações')
+    parser.add_argument('--seed', type=int, default=42, help='semente do sorteio')
+    args = parser.parse_args()
+
+    write_dataset(args.output, args.rows, category_skew=args.category_skew, status_skew=args.status_skew,
+                  start=args.start, days=args.days, seed=args.seed)
+    print(f"{args.rows} reclamações gravadas em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
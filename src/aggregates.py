@@ -0,0 +1,89 @@
+import threading
+from collections import Counter
+
+import pandas as pd
+
+
+class RunningAggregates:
+    """Contagens acumuladas das reclamações, atualizadas lote a lote
+
+    Cada lote custa O(tamanho do lote); a leitura custa O(valores distintos),
+    sem percorrer novamente todas as reclamações. Percentuais são derivados
+    na leitura a partir das contagens. Lotes e leituras são serializados
+    por uma trava, então requisições simultâneas nunca veem um lote pela metade.
+    """
+
+    GROUP_LEVELS = ['categoria', 'status', 'titulo']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.categorias = Counter()
+        self.status = Counter()
+        self.daily = Counter()
+        self.weekly = Counter()
+        self.groups = Counter()
+
+    @classmethod
+    def from_frame(cls, df):
+        aggregates = cls()
+        aggregates.add_frame(df)
+        return aggregates
+
+    def add_frame(self, df):
+        """Soma um lote de reclamações às contagens"""
+        if df is None or df.empty:
+            return
+
+        # As contagens do lote são calculadas fora da trava; só a soma é serializada
+        categorias = df['categoria'].value_counts()
+        status = df['status'].value_counts()
+        daily = df['data'].value_counts()
+        weekly = df['data'].dt.isocalendar().week.value_counts()
+        groups = df.groupby(self.GROUP_LEVELS, sort=False, observed=True).size()
+        with self._lock:
+            self.total += len(df)
+            self._merge(self.categorias, categorias)
+            self._merge(self.status, status)
+            self._merge(self.daily, daily)
+            self._merge(self.weekly, weekly)
+            self._merge(self.groups, groups)
+
+    def _merge(self, counter, counts):
+        for key, count in counts.items():
+            if count:
+                counter[key] += int(count)
+
+    def _ranked(self, counter, name):
+        """Contagens em ordem decrescente, como value_counts"""
+        with self._lock:
+            items = sorted(counter.items(), key=lambda item: item[1], reverse=True)
+        return pd.Series(dict(items), dtype='int64', name='count').rename_axis(name)
+
+    def category_counts(self):
+        return self._ranked(self.categorias, 'categoria')
+
+    def status_counts(self):
+        return self._ranked(self.status, 'status')
+
+    def daily_counts(self):
+        with self._lock:
+            daily = dict(self.daily)
+        return pd.Series(daily, dtype='int64').rename_axis('data').sort_index()
+
+    def weekly_counts(self):
+        with self._lock:
+            weekly = dict(self.weekly)
+        return pd.Series(weekly, dtype='int64').rename_axis('week').sort_index()
+
+    def group_counts(self):
+        """Contagem por (categoria, status, titulo)"""
+        with self._lock:
+            keys, values = list(self.groups.keys()), list(self.groups.values())
+        index = pd.MultiIndex.from_tuples(keys, names=self.GROUP_LEVELS)
+        return pd.Series(values, index=index, dtype='int64')
+
+    def snapshot(self):
+        """Cópia consistente do total e das contagens por dia e por grupo"""
+        with self._lock:
+            return self.total, dict(self.daily), dict(self.groups)
@@ -1,50 +1,486 @@
 import json
 import pandas as pd
+from pandas.api.types import union_categoricals
 from datetime import datetime
 from collections import Counter
-import matplotlib.pyplot as plt
-import seaborn as sns
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-import matplotlib
 import io
-import base64
-from reportlab.platypus import Image as ReportLabImage
+import os
+import hashlib
+import multiprocessing
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+from src.aggregates import RunningAggregates
+from src.chart_cache import ChartCache, chart_cache
+from src.columnar_cache import read_sidecar, write_sidecar
+from src.json_stream import JsonArrayStream
+from src.partitions import normalize_date_range, prune_partitions, resolve_partitions
+from src.report_cache import evict_reports, report_filename, report_key, touch
+from src.search_index import SearchIndex, parse_query, query_terms
+from src.term_index import TermIndex
+from src.tracing import span, traced
+
+# matplotlib e ReportLab só são importados quando um relatório é gerado,
+# para não pesar na partida do agente (perguntas de chat não precisam deles)
+
+@lru_cache(maxsize=1)
+def _report_styles():
+    """Estilos de parágrafo do relatório, criados uma vez por processo"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        textColor=colors.darkblue
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=12,
+        alignment=TA_JUSTIFY
+    )
+    return title_style, heading_style, normal_style
+
+@lru_cache(maxsize=1)
+def _table_style():
+    """Estilo das tabelas de categorias e status"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+def _read_partition(path, compact, chunk_size, use_cache):
+    """Lê um dump isolado; executado nos processos do pool de carga"""
+    analyzer = Analyzer(path, compact=compact, chunk_size=chunk_size, use_cache=use_cache)
+    analyzer._load_file()
+    return analyzer.df, analyzer.data['metadata']
 
-# Configurar matplotlib para não usar GUI
-matplotlib.use('Agg')
 
 class Analyzer:
-    def __init__(self, json_file_path):
+    # Colunas de baixa cardinalidade guardadas como categorias no modo compacto
+    CATEGORICAL_COLUMNS = ['categoria', 'status', 'titulo']
+    # Campos sem os quais uma reclamação anexada não entra nas contagens
+    REQUIRED_COLUMNS = ['data', 'titulo', 'status', 'categoria']
+    
+    def __init__(self, json_file_path, compact=False, chunk_size=None, use_cache=True,
+                 date_range=None, workers=None):
+        # Pode ser um arquivo, um diretório de dumps diários ou um glob
         self.json_file_path = json_file_path
+        self.compact = compact
+        # Com chunk_size o JSON é lido em lotes, limitando o pico de memória
+        self.chunk_size = chunk_size
+        # Cache colunar ao lado do JSON, reaproveitado entre processos
+        self.use_cache = use_cache
+        # Período (início, fim) de interesse; dumps fora dele nem são lidos
+        self.date_range = normalize_date_range(date_range)
+        # Processos usados para carregar vários dumps em paralelo
+        self.workers = workers
+        # Serializa anexos, consolidação e cálculo dos agregados entre requisições
+        self._lock = threading.RLock()
         self.data = None
         self.df = None
+        # No modo compacto as descrições ficam fora do DataFrame principal
+        self.descricoes = None
+        # Versão dos dados carregados e cache dos agregados desta versão
+        self.version = 0
+        self._aggregates = {}
+        # Contagens mantidas incrementalmente a cada lote anexado
+        self._running = None
+        # Índice de busca: montado na primeira consulta e atualizado a cada lote anexado
+        self._search = None
+        # Soma dos hashes das descrições (entra no fingerprint), estendida a cada lote
+        self._descriptions_digest = 0
+        
+    @property
+    def df(self):
+        """DataFrame das reclamações, incluindo os lotes anexados"""
+        if self._pending_frames:
+            with self._lock:
+                if self._pending_frames:
+                    self._consolidate()
+        return self._df
+    
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._pending_frames = []
+        self._pending_descricoes = []
+    
+    def _memoize(self, key, compute):
+        """Calcula o agregado uma única vez por versão dos dados
         
+        Os agregados são compartilhados entre requisições e não devem ser
+        alterados por quem os lê. O cálculo roda sob a trava, então chamadas
+        simultâneas não repetem o trabalho e um anexo no meio do cálculo não
+        deixa um valor antigo no cache da versão nova.
+        """
+        aggregates = self._aggregates
+        if key in aggregates:
+            return aggregates[key]
+        with self._lock:
+            aggregates = self._aggregates
+            if key not in aggregates:
+                with span('analyzer.aggregate', key=key):
+                    aggregates[key] = compute()
+            return aggregates[key]
+    
+    def invalidate_cache(self):
+        """Descarta os agregados calculados e avança a versão dos dados"""
+        with self._lock:
+            self.version += 1
+            self._aggregates = {}
+    
+    def _category_counts(self):
+        """Contagem de reclamações por categoria"""
+        return self._memoize('categoria_counts', self._running.category_counts)
+    
+    def _status_counts(self):
+        """Contagem de reclamações por status"""
+        return self._memoize('status_counts', self._running.status_counts)
+    
+    def _daily_counts(self):
+        """Contagem de reclamações por dia"""
+        return self._memoize('daily_counts', self._running.daily_counts)
+    
+    def _weekly_counts(self):
+        """Contagem de reclamações por semana ISO"""
+        return self._memoize('weekly_counts', self._running.weekly_counts)
+    
+    @traced('analyzer.load_data')
     def load_data(self):
         """Carrega os dados do arquivo JSON"""
         try:
-            with open(self.json_file_path, 'r', encoding='utf-8') as file:
-                self.data = json.load(file)
+            if os.path.isfile(self.json_file_path):
+                self._load_file()
+            else:
+                self._load_partitions()
             
-            # Criar DataFrame com as reclamações
-            self.df = pd.DataFrame(self.data['reclamacoes'])
-            self.df['data'] = pd.to_datetime(self.df['data'])
+            self._apply_date_range()
+            if self.compact:
+                self._split_descriptions()
+            self._running = RunningAggregates.from_frame(self.df)
+            self._descriptions_digest = self._hash_descriptions(self.get_descriptions(), len(self.df))
+            self._search = None
+            self.invalidate_cache()
             return True
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
             return False
     
+    def _load_file(self):
+        """Carrega um único arquivo de reclamações"""
+        # Cache colunar válido dispensa o parse do JSON e a conversão de datas
+        loaded = False
+        if self.use_cache:
+            with span('analyzer.load_cache', arquivo=os.path.basename(self.json_file_path)):
+                loaded = self._load_sidecar()
+        if not loaded:
+            with span('analyzer.load_json', arquivo=os.path.basename(self.json_file_path)):
+                self._load_json()
+            if self.use_cache:
+                self._write_sidecar()
+    
+    @traced('analyzer.load_partitions')
+    def _load_partitions(self):
+        """Carrega vários dumps em paralelo e remove as reclamações repetidas entre eles"""
+        available = resolve_partitions(self.json_file_path)
+        if not available:
+            raise FileNotFoundError(f"Nenhum arquivo de reclamações encontrado em {self.json_file_path}")
+        # Período depois do último dump: o mais recente basta para montar o DataFrame (vazio após o filtro)
+        partitions = prune_partitions(available, self.date_range) or available[-1:]
+        
+        options = [self.compact, self.chunk_size, self.use_cache]
+        if len(partitions) == 1 or self.workers == 1:
+            results = [_read_partition(path, *options) for path in partitions]
+        else:
+            max_workers = self.workers or min(len(partitions), os.cpu_count() or 1)
+            # spawn evita herdar locks de threads do servidor web no fork
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(_read_partition, partitions,
+                                            *[[option] * len(partitions) for option in options]))
+        
+        # Sem id, a reclamação é identificada pelos campos presentes em todos os dumps
+        shared = [column for column in results[0][0].columns
+                  if column != 'status' and all(column in df.columns for df, _ in results)]
+        frames = [self._tag_occurrences(df, shared) for df, _ in results]
+        df = self._concat_frames(frames)
+        
+        # Dumps mais novos vêm por último: a versão mais recente (ex: status atualizado) prevalece
+        key = ['id'] if 'id' in shared else shared + ['_ocorrencia']
+        df = df.drop_duplicates(subset=key, keep='last').reset_index(drop=True)
+        self.df = df.drop(columns='_ocorrencia', errors='ignore')
+        
+        metadata = dict(results[-1][1])
+        metadata['total_reclamacoes'] = len(self.df)
+        metadata['arquivos'] = len(partitions)
+        self.data = {'metadata': metadata}
+    
+    def _tag_occurrences(self, df, columns):
+        """Numera reclamações idênticas (nas colunas `columns`) dentro de um mesmo dump
+        
+        Assim só as repetições entre dumps diferentes são removidas; registros
+        iguais que já vinham repetidos no mesmo arquivo são preservados.
+        """
+        if 'id' in columns:
+            return df
+        return df.assign(_ocorrencia=df.groupby(columns, sort=False, observed=True, dropna=False).cumcount())
+    
+    def _apply_date_range(self):
+        """Mantém apenas as reclamações do período configurado"""
+        if not self.date_range:
+            return
+        
+        start, end = self.date_range
+        mask = pd.Series(True, index=self.df.index)
+        if start is not None:
+            mask &= self.df['data'] >= start
+        if end is not None:
+            mask &= self.df['data'] <= end
+        
+        self.df = self.df[mask].reset_index(drop=True)
+        self.data = {**self.data, 'metadata': {**self.data['metadata'], 'total_reclamacoes': len(self.df)}}
+    
+    def _load_json(self):
+        """Lê as reclamações diretamente do JSON de origem"""
+        if self.chunk_size:
+            self._load_streaming()
+            return
+        
+        with open(self.json_file_path, 'r', encoding='utf-8') as file:
+            self.data = json.load(file)
+        
+        # Criar DataFrame com as reclamações
+        self.df = self._build_frame(self.data['reclamacoes'])
+        if self.compact:
+            # As reclamações já estão no DataFrame; manter só os metadados
+            self.data = {'metadata': self.data['metadata']}
+    
+    def _load_sidecar(self):
+        """Carrega o cache colunar quando ele corresponde ao JSON atual"""
+        try:
+            cached = read_sidecar(self.json_file_path, self.CATEGORICAL_COLUMNS if self.compact else ())
+        except Exception as e:
+            print(f"Cache colunar ignorado: {e}")
+            return False
+        
+        if cached is None:
+            return False
+        
+        self.df, metadata = cached
+        self.data = {'metadata': metadata}
+        return True
+    
+    def _write_sidecar(self):
+        """Grava o cache colunar; falhas (ex: diretório somente leitura) não impedem a análise"""
+        try:
+            write_sidecar(self.json_file_path, self.df, self.data['metadata'])
+        except Exception as e:
+            print(f"Não foi possível gravar o cache colunar: {e}")
+    
+    def _load_streaming(self):
+        """Lê o array de reclamações em lotes de `chunk_size` registros"""
+        stream = JsonArrayStream(self.json_file_path, 'reclamacoes', batch_size=self.chunk_size)
+        frames = [self._build_frame(batch) for batch in stream]
+        
+        self.df = self._concat_frames(frames)
+        # Os demais campos de topo (metadata) continuam acessíveis em self.data
+        self.data = stream.fields
+    
+    def _build_frame(self, records):
+        """Monta o DataFrame de um conjunto de reclamações"""
+        df = pd.DataFrame(records)
+        df['data'] = pd.to_datetime(df['data'])
+        
+        if self.compact:
+            for column in self.CATEGORICAL_COLUMNS:
+                if column in df.columns:
+                    df[column] = df[column].astype('category')
+        return df
+    
+    def _concat_frames(self, frames):
+        """Concatena lotes sobre a união das colunas, preservando as categóricas
+        
+        Uma coluna ausente em algum lote fica vazia (NaN) nas linhas dele,
+        como no DataFrame montado de uma vez a partir de todos os registros.
+        """
+        if not frames:
+            return pd.DataFrame(columns=['data', 'titulo', 'descricao', 'status', 'categoria'])
+        if len(frames) == 1:
+            return frames[0]
+        
+        names = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+        columns = {}
+        for column in names:
+            present = [frame[column] for frame in frames if column in frame.columns]
+            categorical = next((part for part in present if isinstance(part.dtype, pd.CategoricalDtype)), None)
+            parts = []
+            for frame in frames:
+                if column in frame.columns:
+                    part = frame[column]
+                elif categorical is not None:
+                    part = pd.Series(pd.Categorical([None] * len(frame), categories=categorical.cat.categories[:0]))
+                else:
+                    # Textos continuam textos; números ausentes viram float com NaN, como no json.load
+                    dtype = present[0].dtype if pd.api.types.is_string_dtype(present[0].dtype) else 'float64'
+                    part = pd.Series(index=range(len(frame)), dtype=dtype)
+                if categorical is not None and not isinstance(part.dtype, pd.CategoricalDtype):
+                    part = part.astype('category')
+                parts.append(part.reset_index(drop=True))
+            if categorical is not None:
+                columns[column] = pd.Series(union_categoricals(parts, ignore_order=True))
+            else:
+                columns[column] = pd.concat(parts, ignore_index=True)
+        return pd.DataFrame(columns)
+    
+    def append_records(self, records):
+        """Anexa um lote de novas reclamações aos dados carregados
+        
+        As contagens são atualizadas em O(tamanho do lote); o DataFrame
+        completo só é remontado quando alguma consulta precisar dele.
+        """
+        if self._running is None:
+            return False
+        if not records:
+            return True
+        
+        # Lote inválido é recusado inteiro, antes de mexer nas contagens
+        missing = [column for column in self.REQUIRED_COLUMNS
+                   if any(record.get(column) is None for record in records)]
+        if missing:
+            print(f"Lote recusado: reclamações sem {', '.join(missing)}")
+            return False
+        try:
+            batch = self._build_frame(records)
+        except Exception as e:
+            print(f"Lote recusado: {e}")
+            return False
+        
+        digest = self._hash_descriptions(batch.get('descricao'), len(batch))
+        descricoes = None
+        if self.compact:
+            # Uma descrição por linha do lote, mesmo quando o campo falta
+            if 'descricao' in batch.columns:
+                descricoes = batch['descricao'].reset_index(drop=True)
+                batch = batch.drop(columns='descricao')
+            else:
+                descricoes = pd.Series([None] * len(batch), dtype=object)
+        
+        with self._lock:
+            if descricoes is not None:
+                self._pending_descricoes.append(descricoes)
+            self._pending_frames.append(batch)
+            self._running.add_frame(batch)
+            self._descriptions_digest = (self._descriptions_digest + digest) % 2**64
+            if self._search is not None:
+                self._search.add_frame(batch, descricoes)
+            metadata = self.data.get('metadata') if self.data else None
+            if metadata and 'total_reclamacoes' in metadata:
+                metadata['total_reclamacoes'] += len(batch)
+            self.invalidate_cache()
+        return True
+    
+    def append_file(self, delta_json_path):
+        """Anexa as reclamações de um arquivo JSON delta (mesmo formato do original)"""
+        try:
+            stream = JsonArrayStream(delta_json_path, 'reclamacoes', batch_size=self.chunk_size or 10000)
+            for batch in stream:
+                if not self.append_records(batch):
+                    return False
+            return True
+        except Exception as e:
+            print(f"Erro ao anexar dados: {e}")
+            return False
+    
+    def _consolidate(self):
+        """Incorpora os lotes pendentes ao DataFrame principal (chamado sob a trava)
+        
+        Um novo DataFrame substitui o anterior; quem já tinha uma referência
+        ao antigo continua lendo dados íntegros.
+        """
+        frames, self._pending_frames = self._pending_frames, []
+        descricoes, self._pending_descricoes = self._pending_descricoes, []
+        
+        self._df = self._concat_frames([self._df] + frames)
+        if descricoes:
+            base = self.descricoes
+            if base is None:
+                base = pd.Series([None] * (len(self._df) - sum(len(part) for part in descricoes)), dtype=object)
+            self.descricoes = pd.concat([base] + descricoes, ignore_index=True)
+    
+    def _split_descriptions(self):
+        """Move as descrições para fora do DataFrame principal"""
+        if 'descricao' in self.df.columns:
+            self.descricoes = self.df['descricao']
+            self.df = self.df.drop(columns='descricao')
+    
+    def get_descriptions(self, index=None):
+        """Retorna as descrições das reclamações (todas ou dos índices informados)"""
+        if self.df is None:
+            return None
+        
+        # DataFrame e descrições são trocados juntos na consolidação
+        with self._lock:
+            descricoes = self.descricoes if self.descricoes is not None else self.df.get('descricao')
+        if descricoes is None or index is None:
+            return descricoes
+        return descricoes.loc[index]
+    
+    def memory_footprint(self):
+        """Retorna o consumo de memória dos dados carregados, em bytes"""
+        if self.df is None:
+            return None
+        # memory_usage(deep=True) percorre as colunas de texto: uma vez por versão dos dados
+        return self._memoize('memoria', self._compute_memory_footprint)
+    
+    def _compute_memory_footprint(self):
+        df = self.df
+        usage = df.memory_usage(deep=True)
+        dataframe_bytes = int(usage.sum())
+        descricoes_bytes = int(self.descricoes.memory_usage(deep=True)) if self.descricoes is not None else 0
+        
+        return {
+            'dataframe_bytes': dataframe_bytes,
+            'descricoes_bytes': descricoes_bytes,
+            'total_bytes': dataframe_bytes + descricoes_bytes,
+            'columns': {column: int(usage[column]) for column in df.columns}
+        }
+    
     def analyze_categories(self):
         """Analisa as categorias mais citadas"""
-        if self.df is None:
+        if self._running is None:
             return None
-            
-        categoria_counts = self.df['categoria'].value_counts()
-        total_reclamacoes = len(self.df)
+        return self._memoize('categorias', self._compute_categories)
+    
+    def _compute_categories(self):
+        categoria_counts = self._category_counts()
+        total_reclamacoes = self._running.total
         
         categoria_analysis = {}
         for categoria, count in categoria_counts.items():
@@ -58,11 +494,13 @@ class Analyzer:
     
     def analyze_status(self):
         """Analisa os status das reclamações"""
-        if self.df is None:
+        if self._running is None:
             return None
-            
-        status_counts = self.df['status'].value_counts()
-        total_reclamacoes = len(self.df)
+        return self._memoize('status', self._compute_status)
+    
+    def _compute_status(self):
+        status_counts = self._status_counts()
+        total_reclamacoes = self._running.total
         
         status_analysis = {}
         for status, count in status_counts.items():
@@ -76,39 +514,211 @@ class Analyzer:
     
     def analyze_trends(self):
         """Analisa tendências por data"""
-        if self.df is None:
+        if self._running is None:
             return None
-            
+        return self._memoize('trends', self._compute_trends)
+    
+    def _compute_trends(self):
         # Agrupa por data
-        trends = self.df.groupby('data').size().reset_index(name='count')
+        trends = self._daily_counts().reset_index(name='count')
         
         # Análise por semana
-        self.df['week'] = self.df['data'].dt.isocalendar().week
-        weekly_trends = self.df.groupby('week').size()
+        weekly_trends = self._weekly_counts()
+        
+        # Sem reclamações (período sem dados) não há intervalo de datas
+        date_range = {}
+        if not trends.empty:
+            date_range = {
+                'start': trends['data'].min().strftime('%Y-%m-%d'),
+                'end': trends['data'].max().strftime('%Y-%m-%d')
+            }
         
         return {
             'daily_trends': trends,
             'weekly_trends': weekly_trends,
-            'date_range': {
-                'start': self.df['data'].min().strftime('%Y-%m-%d'),
-                'end': self.df['data'].max().strftime('%Y-%m-%d')
-            }
+            'date_range': date_range
         }
     
     def get_top_issues(self, top_n=5):
         """Retorna os principais problemas por categoria"""
-        if self.df is None:
+        if self._running is None:
             return None
-            
+        return self._memoize(('top_issues', top_n), lambda: self._compute_top_issues(top_n))
+    
+    def _compute_top_issues(self, top_n):
+        # Títulos mais comuns de cada categoria a partir do agrupamento único
+        title_counts = self._category_groups().groupby(
+            level=['categoria', 'titulo'], sort=False, observed=True).sum()
+        ranked = title_counts.sort_values(ascending=False, kind='stable')
+        top = ranked.groupby(level='categoria', sort=False).head(top_n)
+        
         top_issues = {}
-        for categoria in self.df['categoria'].unique():
-            categoria_df = self.df[self.df['categoria'] == categoria]
-            # Pegar os títulos mais comuns desta categoria
-            titles = categoria_df['titulo'].value_counts().head(top_n)
-            top_issues[categoria] = titles.to_dict()
+        for (categoria, titulo), count in top.items():
+            top_issues.setdefault(categoria, {})[titulo] = int(count)
         
         return top_issues
     
+    def _category_groups(self):
+        """Contagem por categoria, status e título, mantida lote a lote"""
+        return self._memoize('category_groups', self._running.group_counts)
+    
+    def _status_crosstab(self):
+        """Tabela categoria x status derivada do agrupamento único"""
+        return self._memoize('status_crosstab', lambda: self._category_groups().groupby(
+            level=['categoria', 'status'], sort=False, observed=True).sum().unstack(fill_value=0))
+    
+    def get_status_by_category(self):
+        """Retorna a distribuição de status dentro de cada categoria"""
+        if self._running is None:
+            return None
+        return self._memoize('status_by_category', self._compute_status_by_category)
+    
+    def _compute_status_by_category(self):
+        crosstab = self._status_crosstab()
+        totals = crosstab.sum(axis=1)
+        
+        status_by_category = {}
+        for categoria, row in crosstab.iterrows():
+            total = int(totals[categoria])
+            status_by_category[categoria] = {
+                status: {
+                    'count': int(count),
+                    'percentage': round((count / total) * 100, 2) if total else 0.0
+                }
+                for status, count in row.items() if count
+            }
+        
+        return status_by_category
+    
+    def get_resolution_by_category(self):
+        """Retorna a taxa de resolução de cada categoria, da menor para a maior"""
+        if self._running is None:
+            return None
+        return self._memoize('resolution_by_category', self._compute_resolution_by_category)
+    
+    def _compute_resolution_by_category(self):
+        crosstab = self._status_crosstab()
+        totals = crosstab.sum(axis=1)
+        resolvidos = crosstab['Resolvido'] if 'Resolvido' in crosstab.columns else totals * 0
+        taxas = (resolvidos / totals * 100).round(2).sort_values(kind='stable')
+        
+        return {
+            categoria: {
+                'total': int(totals[categoria]),
+                'resolvidos': int(resolvidos[categoria]),
+                'taxa_resolucao': float(taxa)
+            }
+            for categoria, taxa in taxas.items()
+        }
+    
+    def get_category_breakdown(self, top_n=5):
+        """Retorna, por categoria, total, status, taxa de resolução e principais títulos"""
+        if self._running is None:
+            return None
+        
+        status_by_category = self.get_status_by_category()
+        resolution = self.get_resolution_by_category()
+        top_issues = self.get_top_issues(top_n)
+        
+        return {
+            categoria: {
+                'total': dados['total'],
+                'taxa_resolucao': dados['taxa_resolucao'],
+                'status': status_by_category.get(categoria, {}),
+                'top_issues': top_issues.get(categoria, {})
+            }
+            for categoria, dados in resolution.items()
+        }
+    
+    def _term_index(self):
+        """Índice de frequência de termos de títulos e descrições desta versão dos dados"""
+        return self._memoize('term_index', lambda: TermIndex.from_frame(self.df, self.get_descriptions()))
+    
+    def top_terms(self, n=10, **filters):
+        """Termos mais frequentes em títulos e descrições: {termo: ocorrências}
+        
+        Filtros: field ('titulo' ou 'descricao'), categoria, start/end e
+        ngram (1 = palavras, 2 = pares de palavras, (2, 3) = expressões).
+        """
+        if self._running is None:
+            return None
+        return self._term_index().top_terms(n, **filters)
+    
+    def top_terms_by_category(self, n=5, **filters):
+        """Termos mais frequentes de cada categoria: {categoria: {termo: ocorrências}}"""
+        if self._running is None:
+            return None
+        return self._term_index().top_terms_by_category(n, **filters)
+    
+    def top_terms_by_period(self, freq='W', n=5, **filters):
+        """Termos mais frequentes por período (dia 'D', semana 'W', mês 'M')"""
+        if self._running is None:
+            return None
+        return self._term_index().top_terms_by_period(freq, n, **filters)
+    
+    def _search_index(self):
+        """Índice invertido de títulos e descrições, montado uma vez e mantido pelos anexos"""
+        index = self._search
+        if index is None:
+            with self._lock:
+                if self._search is None:
+                    with span('analyzer.search_index'):
+                        self._search = SearchIndex.from_frame(self.df, self.get_descriptions())
+                index = self._search
+        return index
+    
+    def search(self, query=None, categoria=None, status=None, start=None, end=None, limit=5):
+        """Busca reclamações por palavras-chave, categoria, status e período
+        
+        Retorna o total encontrado, a distribuição por categoria e status e
+        as `limit` reclamações mais recentes como exemplo. As palavras são
+        comparadas sem acento, plural ou gênero e todas devem aparecer no
+        título ou na descrição.
+        """
+        if self._running is None:
+            return None
+        
+        index = self._search_index()
+        ids = index.search(query_terms(query) if query else (), categoria, status, start, end)
+        facets = index.facets(ids)
+        samples = index.latest(ids, limit)
+        
+        # O índice nunca está à frente do DataFrame: anexos atualizam os dois sob a trava
+        rows = self.df.iloc[samples]
+        descricoes = self.get_descriptions()
+        amostras = []
+        for position, row in zip(samples, rows.itertuples(index=False)):
+            amostras.append({
+                'data': row.data.strftime('%Y-%m-%d'),
+                'titulo': row.titulo,
+                'descricao': descricoes.iloc[position] if descricoes is not None else None,
+                'status': row.status,
+                'categoria': row.categoria
+            })
+        
+        return {
+            'consulta': {
+                'termos': query,
+                'categoria': categoria,
+                'status': [status] if isinstance(status, str) else status,
+                'inicio': str(start) if start is not None else None,
+                'fim': str(end) if end is not None else None
+            },
+            'total': int(len(ids)),
+            'por_categoria': facets['categoria'],
+            'por_status': facets['status'],
+            'amostras': amostras
+        }
+    
+    def search_message(self, message, limit=5):
+        """Busca a partir de uma pergunta ("reclamações sobre PIX não encontrado em setembro")"""
+        if self._running is None:
+            return None
+        index = self._search_index()
+        filters = parse_query(message, index.categories, index.statuses, index.last_day())
+        return self.search(limit=limit, **filters)
+    
+    @traced('analyzer.summary')
     def generate_summary_text(self):
         """Gera um resumo textual com insights"""
         if self.df is None:
@@ -119,6 +729,13 @@ class Analyzer:
         status_analysis = self.analyze_status()
         trends = self.analyze_trends()
         
+        if not metadata['total_reclamacoes']:
+            return f"""
+RELATÓRIO DE ANÁLISE DE RECLAMAÇÕES - {metadata.get('fonte', '')}
+
+Nenhuma reclamação encontrada no período solicitado.
+"""
+        
         summary = f"""
 RELATÓRIO DE ANÁLISE DE RECLAMAÇÕES - {metadata['fonte']}
 
@@ -159,120 +776,150 @@ CATEGORIAS MAIS CITADAS:
         categoria_top = sorted_categories[0]
         summary += f"• Categoria mais problemática: {categoria_top[0]} ({categoria_top[1]['percentage']}% das reclamações)\n"
         
-        # Análise de palavras-chave nos títulos
-        all_titles = ' '.join(self.df['titulo'].str.lower())
-        palavras_comuns = ['app', 'cartão', 'pix', 'conta', 'problema', 'erro', 'não', 'banco']
-        palavras_encontradas = []
-        for palavra in palavras_comuns:
-            if palavra in all_titles:
-                count = all_titles.count(palavra)
-                palavras_encontradas.append((palavra, count))
-        
-        if palavras_encontradas:
-            palavras_encontradas.sort(key=lambda x: x[1], reverse=True)
-            summary += f"• Palavras mais mencionadas nos títulos: {', '.join([f'{p[0]} ({p[1]}x)' for p in palavras_encontradas[:3]])}\n"
+        # Termos mais frequentes nos títulos e expressões mais frequentes nas descrições
+        palavras = self.top_terms(3, field='titulo', ngram=1)
+        if palavras:
+            summary += f"• Palavras mais mencionadas nos títulos: {', '.join(f'{termo} ({count}x)' for termo, count in palavras.items())}\n"
+        expressoes = self.top_terms(3, field='descricao', ngram=(2, 3))
+        if expressoes:
+            summary += f"• Expressões mais frequentes nas descrições: {', '.join(f'{termo} ({count}x)' for termo, count in expressoes.items())}\n"
         
         return summary
     
-    def create_charts(self):
+    @traced('analyzer.charts')
+    def create_charts(self, use_cache=True):
         """Cria gráficos para o relatório"""
-        charts = []
+        if self._running is None:
+            return []
         
-        if self.df is None:
-            return charts
-        
-        # Gráfico 1: Distribuição por categorias
-        plt.figure(figsize=(10, 6))
-        categoria_counts = self.df['categoria'].value_counts()
-        plt.pie(categoria_counts.values, labels=categoria_counts.index, autopct='%1.1f%%', startangle=90)
-        plt.title('Distribuição de Reclamações por Categoria')
-        
-        # Salvar como bytes
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', bbox_inches='tight', dpi=150)
-        img_buffer.seek(0)
-        charts.append(('categoria_pie', img_buffer.getvalue()))
-        plt.close()
-        
-        # Gráfico 2: Distribuição por status
-        plt.figure(figsize=(10, 6))
-        status_counts = self.df['status'].value_counts()
-        colors_status = ['#2ecc71', '#e74c3c', '#f39c12', '#3498db']
-        plt.bar(status_counts.index, status_counts.values, color=colors_status[:len(status_counts)])
-        plt.title('Distribuição de Reclamações por Status')
-        plt.xticks(rotation=45, ha='right')
-        plt.ylabel('Quantidade')
-        
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', bbox_inches='tight', dpi=150)
-        img_buffer.seek(0)
-        charts.append(('status_bar', img_buffer.getvalue()))
-        plt.close()
-        
-        # Gráfico 3: Timeline das reclamações
-        plt.figure(figsize=(12, 6))
-        daily_counts = self.df.groupby('data').size()
-        plt.plot(daily_counts.index, daily_counts.values, marker='o', linewidth=2, markersize=6)
-        plt.title('Timeline de Reclamações')
-        plt.xlabel('Data')
-        plt.ylabel('Número de Reclamações')
-        plt.xticks(rotation=45)
-        plt.grid(True, alpha=0.3)
-        
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', bbox_inches='tight', dpi=150)
-        img_buffer.seek(0)
-        charts.append(('timeline', img_buffer.getvalue()))
-        plt.close()
-        
-        return charts
+        specs = self._chart_specs()
+        keys = [ChartCache.make_key(*spec) for spec in specs]
+        
+        # Mesmos agregados e parâmetros geram o mesmo PNG: reaproveitar do cache
+        pngs = [chart_cache.get(key) if use_cache else None for key in keys]
+        missing = [i for i, png in enumerate(pngs) if png is None]
+        
+        # Gráficos ausentes são renderizados em paralelo, um por tarefa
+        if missing:
+            from src.charts import render_charts
+            
+            with span('charts.render', charts=len(missing)):
+                rendered = render_charts([specs[i] for i in missing])
+            for i, png in zip(missing, rendered):
+                pngs[i] = png
+                if use_cache:
+                    chart_cache.put(keys[i], png)
+        
+        return [(name, png) for (name, _, _), png in zip(specs, pngs)]
+    
+    def _chart_specs(self):
+        """Dados e parâmetros de cada gráfico do relatório"""
+        categoria_counts = self._category_counts()
+        status_counts = self._status_counts()
+        daily_counts = self._daily_counts()
+        
+        return [
+            ('categoria_pie',
+             {'labels': [str(label) for label in categoria_counts.index], 'values': [int(v) for v in categoria_counts.values]},
+             {'figsize': (10, 6), 'dpi': 150, 'title': 'Distribuição de Reclamações por Categoria'}),
+            ('status_bar',
+             {'labels': [str(label) for label in status_counts.index], 'values': [int(v) for v in status_counts.values]},
+             {'figsize': (10, 6), 'dpi': 150, 'title': 'Distribuição de Reclamações por Status',
+              'colors': ['#2ecc71', '#e74c3c', '#f39c12', '#3498db']}),
+            ('timeline',
+             {'labels': [date.strftime('%Y-%m-%d') for date in daily_counts.index], 'values': [int(v) for v in daily_counts.values]},
+             {'figsize': (12, 6), 'dpi': 150, 'title': 'Timeline de Reclamações'}),
+        ]
+    
+    def fingerprint(self):
+        """Hash do conteúdo analisado (metadados e contagens), estável entre processos"""
+        if self._running is None:
+            return None
+        return self._memoize('fingerprint', self._compute_fingerprint)
     
+    def _compute_fingerprint(self):
+        total, daily, groups = self._running.snapshot()
+        content = {
+            'metadata': self.data.get('metadata') if self.data else None,
+            'total': total,
+            'daily': sorted((str(date), count) for date, count in daily.items()),
+            'groups': sorted((list(map(str, key)), count) for key, count in groups.items()),
+            'descricoes': self._descriptions_digest,
+        }
+        payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _hash_descriptions(descricoes, length):
+        """Soma (mód. 2^64) dos hashes das descrições: muda quando alguma muda, mas não com a ordem
+        
+        O índice de termos lê as descrições, então editá-las precisa gerar outro relatório.
+        Como a soma não depende da ordem, cada lote anexado só soma os hashes dele.
+        """
+        if descricoes is None:
+            descricoes = pd.Series([None] * length, dtype=object)
+        # Descrição ausente tem o mesmo hash venha como None ou NaN
+        values = descricoes.astype(object)
+        values = values.where(values.notna(), None)
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        return int(hashes.sum(dtype='uint64'))
+    
+    def _results_dir(self):
+        """Diretório results/ do projeto, criado se necessário"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        results_dir = os.path.join(os.path.dirname(current_dir), "results")
+        os.makedirs(results_dir, exist_ok=True)
+        return results_dir
+    
+    @traced('analyzer.report')
+    def get_or_generate_pdf_report(self, options=None):
+        """Retorna o caminho do relatório destes dados, gerando o PDF só se ainda não existir
+        
+        O nome do arquivo é derivado do hash da versão dos dados e das opções,
+        então pedidos repetidos reaproveitam o mesmo PDF. Retorna None em caso de erro.
+        """
+        if self._running is None:
+            return None
+        
+        results_dir = self._results_dir()
+        output_path = os.path.join(results_dir, report_filename(report_key(self.fingerprint(), options)))
+        
+        if os.path.exists(output_path):
+            touch(output_path)
+            return output_path
+        
+        # Gerar em arquivo temporário para que pedidos simultâneos nunca leiam um PDF incompleto
+        tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if not self.generate_pdf_report(tmp_path):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, output_path)
+        
+        evict_reports(results_dir, keep=[output_path])
+        return output_path
+    
+    @traced('analyzer.pdf')
     def generate_pdf_report(self, output_path="relatorio_reclamacoes.pdf"):
         """Gera o relatório em PDF"""
         if self.df is None:
             return False
         
-        # Garantir que o diretório results existe
-        import os
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        results_dir = os.path.join(os.path.dirname(current_dir), "results")
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir, exist_ok=True)
-        
         # Se apenas o nome do arquivo foi fornecido, colocar na pasta results
         if not os.path.dirname(output_path):
-            output_path = os.path.join(results_dir, output_path)
+            output_path = os.path.join(self._results_dir(), output_path)
+        
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Image as ReportLabImage
+        from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table
         
         try:
             doc = SimpleDocTemplate(output_path, pagesize=A4, rightMargin=72, leftMargin=72,
                                   topMargin=72, bottomMargin=18)
             
-            # Estilos
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.darkblue
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=12,
-                textColor=colors.darkblue
-            )
-            
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                parent=styles['Normal'],
-                fontSize=11,
-                spaceAfter=12,
-                alignment=TA_JUSTIFY
-            )
+            # Estilos (montados uma única vez por processo)
+            title_style, heading_style, normal_style = _report_styles()
             
             # Conteúdo do PDF
             story = []
@@ -309,16 +956,7 @@ CATEGORIAS MAIS CITADAS:
                 table_data.append([categoria, str(data['count']), f"{data['percentage']}%"])
             
             table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table.setStyle(_table_style())
             
             story.append(table)
             story.append(Spacer(1, 20))
@@ -332,16 +970,7 @@ CATEGORIAS MAIS CITADAS:
                 table_data.append([status, str(data['count']), f"{data['percentage']}%"])
             
             table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table.setStyle(_table_style())
             
             story.append(table)
             story.append(Spacer(1, 20))
@@ -358,7 +987,8 @@ CATEGORIAS MAIS CITADAS:
                 story.append(Spacer(1, 20))
             
             # Construir PDF
-            doc.build(story)
+            with span('reportlab.build'):
+                doc.build(story)
             return True
             
         except Exception as e:
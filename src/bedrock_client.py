@@ -0,0 +1,223 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# boto3/botocore só são importados ao criar o cliente, na primeira chamada ao Bedrock
+
+# Configurações do cliente (variáveis de ambiente)
+MAX_POOL_CONNECTIONS = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', '25'))
+CONNECT_TIMEOUT = float(os.getenv('BEDROCK_CONNECT_TIMEOUT', '3'))
+READ_TIMEOUT = float(os.getenv('BEDROCK_READ_TIMEOUT', '30'))
+MAX_ATTEMPTS = int(os.getenv('BEDROCK_MAX_ATTEMPTS', '4'))
+CIRCUIT_FAILURES = int(os.getenv('BEDROCK_CIRCUIT_FAILURES', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('BEDROCK_CIRCUIT_RESET_SECONDS', '30'))
+# Threads que esperam pelo Bedrock no caminho assíncrono (uma por conexão do pool)
+ASYNC_WORKERS = int(os.getenv('BEDROCK_ASYNC_WORKERS', str(MAX_POOL_CONNECTIONS)))
+
+# Erros causados pela própria requisição: não indicam Bedrock fora do ar
+REQUEST_ERRORS = {'ValidationException', 'ModelErrorException'}
+
+
+class BedrockUnavailable(Exception):
+    """Bedrock não pode ser usado agora (sem cliente ou circuito aberto)"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def error_reason(error):
+    """Nome curto do motivo de uma falha, para logs e métricas"""
+    if isinstance(error, BedrockUnavailable):
+        return error.reason
+    # ClientError do botocore traz o código do erro em `response`
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict) and 'Error' in response:
+        return response['Error'].get('Code', type(error).__name__)
+    return type(error).__name__
+
+
+class CircuitBreaker:
+    """Interrompe as chamadas depois de falhas seguidas
+
+    Com `failure_threshold` falhas consecutivas o circuito abre e as
+    chamadas são recusadas na hora por `reset_seconds`. Depois disso uma
+    única chamada de teste é liberada: se der certo o circuito fecha, se
+    falhar ele abre de novo.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURES, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'fechado'
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return 'meio_aberto'
+            return 'aberto'
+
+    def allow(self):
+        """Indica se uma chamada pode seguir agora"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class PathMetrics:
+    """Conta qual caminho atendeu cada pergunta e por que o Bedrock não foi usado"""
+
+    PATHS = ('bedrock', 'cache', 'rule_based', 'circuit_open')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths = Counter()
+        self._reasons = Counter()
+
+    def record(self, path, reason=None):
+        with self._lock:
+            self._paths[path] += 1
+            if reason:
+                self._reasons[reason] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'paths': {path: self._paths.get(path, 0) for path in self.PATHS},
+                'fallback_reasons': dict(self._reasons),
+            }
+
+
+class ResilientBedrockClient:
+    """Cliente bedrock-runtime com pool de conexões, timeouts, retry adaptativo e circuit breaker
+
+    Expõe `invoke_model` e `invoke_model_with_response_stream` com a mesma
+    assinatura do boto3. Com o circuito aberto, as chamadas falham na hora
+    com BedrockUnavailable em vez de esperar pelos timeouts. O cliente boto3
+    só é criado na primeira chamada.
+    """
+
+    def __init__(self, client=None, breaker=None, **client_kwargs):
+        self._client = client
+        self._client_kwargs = client_kwargs
+        self._client_lock = threading.Lock()
+        self.breaker = breaker or CircuitBreaker()
+
+    @staticmethod
+    def default_config():
+        from botocore.config import Config
+        
+        return Config(
+            max_pool_connections=MAX_POOL_CONNECTIONS,
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT,
+            retries={'mode': 'adaptive', 'total_max_attempts': MAX_ATTEMPTS},
+        )
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                import boto3
+                
+                self._client = boto3.client('bedrock-runtime', config=self.default_config(),
+                                            **self._client_kwargs)
+            return self._client
+
+    def _call(self, method, kwargs):
+        if not self.breaker.allow():
+            raise BedrockUnavailable('circuit_open')
+        try:
+            response = getattr(self._get_client(), method)(**kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        return response
+
+    def _record_error(self, error):
+        if error_reason(error) in REQUEST_ERRORS:
+            # A chamada chegou ao serviço: não conta como indisponibilidade
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def invoke_model(self, **kwargs):
+        response = self._call('invoke_model', kwargs)
+        self.breaker.record_success()
+        return response
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        response = self._call('invoke_model_with_response_stream', kwargs)
+        # Falhas no meio do stream também contam para o circuito
+        return dict(response, body=self._track_stream(response['body']))
+
+    def _track_stream(self, events):
+        failed = False
+        try:
+            for event in events:
+                yield event
+        except Exception as e:
+            failed = True
+            self._record_error(e)
+            raise
+        finally:
+            # Stream fechado antes do fim (ex: cliente SSE desconectou) também libera a chamada de teste
+            if not failed:
+                self.breaker.record_success()
+
+    def stats(self):
+        return {'circuit': self.breaker.state}
+
+
+def create_bedrock_client(region_name, aws_access_key_id=None, aws_secret_access_key=None):
+    """Cliente resiliente com as credenciais explícitas, se houver, ou a cadeia padrão do boto3"""
+    kwargs = {'region_name': region_name}
+    if aws_access_key_id and aws_secret_access_key:
+        kwargs.update(aws_access_key_id=aws_access_key_id, aws_secret_access_key=aws_secret_access_key)
+    return ResilientBedrockClient(**kwargs)
+
+
+# Métricas compartilhadas pelo processo
+bedrock_metrics = PathMetrics()
+
+# O boto3 é bloqueante: no servidor ASGI as chamadas rodam neste executor
+bedrock_executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='bedrock')
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Executa uma chamada bloqueante ao Bedrock sem ocupar o event loop
+
+    Com todas as threads ocupadas, as sessões seguintes esperam na fila do
+    executor como corrotinas, sem uma thread própria cada.
+    """
+    loop = asyncio.get_running_loop()
+    # O contexto acompanha a chamada: spans e medições da requisição continuam ligados a ela
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(bedrock_executor, functools.partial(context.run, func, *args, **kwargs))
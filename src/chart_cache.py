@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ChartCache:
+    """Cache LRU de gráficos PNG, opcionalmente persistido em disco
+
+    A chave é o hash dos agregados desenhados e dos parâmetros do gráfico,
+    então o mesmo gráfico só é renderizado de novo quando os dados mudam.
+    """
+
+    def __init__(self, max_entries=32, disk_dir=None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(name, data, params):
+        payload = json.dumps([name, data, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"chart_{key}.png")
+
+    def get(self, key):
+        """Retorna os bytes do PNG ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        png = None
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            with open(self._disk_path(key), 'rb') as file:
+                png = file.read()
+
+        with self._lock:
+            if png is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, png)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            self._store(key, png)
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as file:
+                    file.write(png)
+                os.replace(tmp_path, self._disk_path(key))
+            except OSError as e:
+                print(f"Não foi possível gravar o gráfico em cache: {e}")
+
+    def _store(self, key, png):
+        self._entries[key] = png
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Cache compartilhado pelo processo; CHART_CACHE_DIR ativa a cópia em disco
+chart_cache = ChartCache(disk_dir=os.getenv('CHART_CACHE_DIR') or None)
@@ -0,0 +1,101 @@
+import atexit
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import matplotlib
+
+# Sem GUI: os gráficos só são desenhados em memória
+matplotlib.use('Agg')
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Processos dedicados à renderização (um por gráfico); 0 ou 1 desenha no processo atual
+RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', min(3, os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_chart(name, data, params):
+    """Renderiza um gráfico do relatório e retorna os bytes do PNG
+
+    Usa a API orientada a objetos (Figure) em vez do estado global do
+    pyplot, então pode rodar em paralelo em threads ou processos.
+    """
+    fig = Figure(figsize=params['figsize'])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    if name == 'categoria_pie':
+        # Gráfico 1: Distribuição por categorias
+        ax.pie(data['values'], labels=data['labels'], autopct='%1.1f%%', startangle=90)
+        ax.set_title(params['title'])
+    elif name == 'status_bar':
+        # Gráfico 2: Distribuição por status
+        ax.bar(data['labels'], data['values'], color=params['colors'][:len(data['values'])])
+        ax.set_title(params['title'])
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+        ax.set_ylabel('Quantidade')
+    else:
+        # Gráfico 3: Timeline das reclamações
+        dates = [datetime.strptime(label, '%Y-%m-%d') for label in data['labels']]
+        ax.plot(dates, data['values'], marker='o', linewidth=2, markersize=6)
+        ax.set_title(params['title'])
+        ax.set_xlabel('Data')
+        ax.set_ylabel('Número de Reclamações')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True, alpha=0.3)
+
+    # Salvar como bytes
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png', bbox_inches='tight', dpi=params['dpi'])
+    return img_buffer.getvalue()
+
+
+def _get_pool():
+    """Pool de renderização criado sob demanda e reaproveitado entre relatórios"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn evita herdar locks de threads do servidor web no fork
+            _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def render_charts(specs):
+    """Renderiza vários gráficos em paralelo, um por tarefa do pool
+
+    `specs` é uma lista de (nome, dados, parâmetros); retorna a lista de
+    PNGs na mesma ordem. Se o pool não estiver disponível, renderiza no
+    processo atual.
+    """
+    if RENDER_WORKERS <= 1 or len(specs) <= 1:
+        return [render_chart(*spec) for spec in specs]
+
+    try:
+        pool = _get_pool()
+        futures = [pool.submit(render_chart, *spec) for spec in specs]
+        return [future.result() for future in futures]
+    except Exception as e:
+        print(f"Renderização paralela indisponível, usando o processo atual: {e}")
+        _reset_pool()
+        return [render_chart(*spec) for spec in specs]
+
+
+atexit.register(_reset_pool)
@@ -0,0 +1,130 @@
+import json
+import os
+
+from src.bedrock_client import bedrock_metrics
+from src.chart_cache import chart_cache
+from src.my_agent import bedrock_client, get_delivery_queue
+from src.prompt_builder import prompt_builder
+from src.response_cache import response_cache
+from src.tracing import stage_durations
+
+# Formato das respostas do chat, comum ao servidor Flask e ao ASGI
+
+# Content-Type da exposição em texto do Prometheus
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def chat_payload(data):
+    """Payload do agente a partir do corpo JSON de /api/chat"""
+    payload = {"prompt": data.get('message', '')}
+    if data.get('email'):
+        payload["email"] = data['email']
+    if data.get('include_timings'):
+        payload["include_timings"] = True
+    return payload
+
+
+def format_agent_response(response):
+    """Converte a resposta do agente no formato usado pelo chat"""
+    result = _format_agent_response(response)
+    if response.get('timings') is not None:
+        result['timings'] = response['timings']
+    return result
+
+
+def _format_agent_response(response):
+    if response.get('status') == 'conversational':
+        return {
+            'response': response.get('response'),
+            'type': 'conversational'
+        }
+    elif response.get('status') == 'success':
+        pdf_path = response.get('pdf_filename')
+        result = {
+            'response': response.get('ai_insights', 'Análise concluída!'),
+            'type': 'analysis',
+            'pdf_filename': pdf_path,
+            'download_url': f"/download/{os.path.basename(pdf_path)}" if pdf_path else None,
+            'email_sent': response.get('email_sent', False),
+            'email_queued': response.get('email_queued', False)
+        }
+
+        if response.get('email_delivery_id'):
+            result['email_status_url'] = f"/api/emails/{response['email_delivery_id']}"
+
+        if response.get('email_message'):
+            result['email_message'] = response.get('email_message')
+
+        return result
+    else:
+        return {
+            'response': f"Erro: {response.get('result', 'Erro desconhecido')}",
+            'type': 'error'
+        }
+
+
+def job_accepted(job_id):
+    """Resposta imediata a um relatório agendado"""
+    return {
+        'response': '⏳ Gerando relatório completo... acompanhe o progresso aqui.',
+        'type': 'job',
+        'job_id': job_id,
+        'status_url': f"/api/jobs/{job_id}"
+    }
+
+
+def job_status_body(job):
+    """Status, progresso e, ao final, o resultado de um relatório"""
+    body = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'stage': job['stage']
+    }
+    if job['status'] == 'concluido':
+        body['result'] = format_agent_response(job['result'])
+    elif job['status'] == 'erro':
+        body['error'] = job['error']
+    return body
+
+
+def email_status_body(delivery_id):
+    """Status da entrega de um e-mail de relatório, ou None se o envio não existir"""
+    delivery = get_delivery_queue().status(delivery_id)
+    if delivery is None:
+        return None
+
+    body = {
+        'delivery_id': delivery['id'],
+        'status': delivery['status'],
+        'attempts': delivery['attempts']
+    }
+    if delivery['result']:
+        body['email_sent'] = delivery['result']['success']
+        body['email_message'] = delivery['result'].get('message', delivery['result'].get('error'))
+    return body
+
+
+def stats_body():
+    """Caminho que atendeu cada pergunta, acertos dos caches e tamanho dos prompts"""
+    return {
+        'bedrock': dict(bedrock_metrics.stats(), **bedrock_client.stats()),
+        'response_cache': response_cache.stats(),
+        'chart_cache': chart_cache.stats(),
+        'prompt': prompt_builder.stats()
+    }
+
+
+def metrics_text():
+    """Métricas no formato de exposição do Prometheus: duração das etapas e caminho das respostas"""
+    paths = bedrock_metrics.stats()['paths']
+    lines = ["# HELP agente_respostas_total Perguntas atendidas por caminho (bedrock, cache, regras, circuito aberto)",
+             "# TYPE agente_respostas_total counter"]
+    lines += [f'agente_respostas_total{{path="{path}"}} {count}' for path, count in paths.items()]
+    return stage_durations.render() + '\n'.join(lines) + '\n'
+
+
+def sse_event(data, event=None):
+    """Formata um evento Server-Sent Events com dados JSON"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
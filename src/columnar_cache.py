@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Incrementar quando o layout do arquivo mudar, invalidando caches antigos
+CACHE_FORMAT_VERSION = 2
+
+
+def sidecar_path(json_file_path):
+    """Caminho do cache colunar ao lado do JSON de origem"""
+    return f"{json_file_path}.cache.npz"
+
+
+def source_fingerprint(json_file_path):
+    """Impressão digital do JSON de origem (mtime, tamanho e versão do formato)"""
+    stat = os.stat(json_file_path)
+    return np.array([stat.st_mtime_ns, stat.st_size, CACHE_FORMAT_VERSION], dtype=np.int64)
+
+
+def _encode_strings(values):
+    """Serializa strings como um buffer UTF-8 contínuo mais offsets"""
+    encoded = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return buffer, offsets
+
+
+def _decode_strings(buffer, offsets):
+    raw = buffer.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def write_sidecar(json_file_path, df, metadata):
+    """Grava o DataFrame tipado ao lado do JSON de origem
+
+    Datas são gravadas como datetime64, números e booleanos no tipo nativo
+    e colunas de texto codificadas em dicionário (códigos + valores únicos),
+    de modo que a leitura não precisa interpretar JSON nem converter tipos.
+    """
+    arrays = {
+        'fingerprint': source_fingerprint(json_file_path),
+        'metadata': np.array(json.dumps(metadata, ensure_ascii=False)),
+    }
+    manifest = []
+
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            manifest.append([column, 'datetime'])
+            # Mesma resolução da leitura do JSON (datas com fuso viram UTC em ns)
+            unit = series.dtype if isinstance(series.dtype, np.dtype) else 'datetime64[ns]'
+            arrays[f'{column}.values'] = series.to_numpy(dtype=unit)
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+            # id e nota continuam números: a deduplicação entre dumps compara os valores
+            manifest.append([column, 'native'])
+            arrays[f'{column}.values'] = series.to_numpy()
+        else:
+            manifest.append([column, 'dictionary'])
+            codes, uniques = pd.factorize(series)
+            buffer, offsets = _encode_strings(uniques)
+            arrays[f'{column}.codes'] = codes.astype(np.int32)
+            arrays[f'{column}.buffer'] = buffer
+            arrays[f'{column}.offsets'] = offsets
+
+    arrays['manifest'] = np.array(json.dumps(manifest))
+
+    path = sidecar_path(json_file_path)
+    # Threads do mesmo processo podem gravar o mesmo cache ao mesmo tempo
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_sidecar(json_file_path, categorical_columns=()):
+    """Lê o cache colunar se ele corresponder à versão atual do JSON
+
+    Retorna (df, metadata) ou None quando não há cache válido. As colunas em
+    `categorical_columns` são devolvidas como categorias; as demais, como texto.
+    """
+    path = sidecar_path(json_file_path)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as arrays:
+        if not np.array_equal(arrays['fingerprint'], source_fingerprint(json_file_path)):
+            return None
+
+        manifest = json.loads(str(arrays['manifest']))
+        metadata = json.loads(str(arrays['metadata']))
+
+        columns = {}
+        for column, kind in manifest:
+            if kind in ('datetime', 'native'):
+                columns[column] = pd.Series(arrays[f'{column}.values'])
+                continue
+
+            categories = _decode_strings(arrays[f'{column}.buffer'], arrays[f'{column}.offsets'])
+            values = pd.Categorical.from_codes(arrays[f'{column}.codes'], categories=categories)
+            if column in categorical_columns:
+                columns[column] = pd.Series(values)
+            else:
+                columns[column] = pd.Series(values).astype(values.categories.dtype)
+
+    return pd.DataFrame(columns), metadata
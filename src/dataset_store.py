@@ -0,0 +1,94 @@
+import glob
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from src.analyzer import Analyzer
+from src.partitions import normalize_date_range, resolve_partitions
+
+
+class DatasetStore:
+    """Mantém um Analyzer carregado por conjunto de dados, compartilhado pelo processo
+
+    Guarda no máximo `max_entries` conjuntos (os usados há mais tempo saem
+    primeiro), já que cada período pedido mantém uma cópia dos dados.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Cargas em andamento: quem pede a mesma chave espera o mesmo resultado
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, data_path):
+        """Identifica a versão dos dados pelo mtime e tamanho de cada arquivo"""
+        fingerprint = []
+        for path in resolve_partitions(data_path):
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(fingerprint)
+
+    def get_analyzer(self, data_path, date_range=None):
+        """Retorna o Analyzer dos dados, recarregando apenas se algum arquivo mudou
+
+        `data_path` pode ser um arquivo, um diretório de dumps ou um glob;
+        `date_range` restringe os dados (e os dumps lidos) a um período.
+        """
+        path = data_path if glob.has_magic(data_path) else os.path.abspath(data_path)
+        date_range = normalize_date_range(date_range)
+        try:
+            fingerprint = self._fingerprint(path)
+        except OSError:
+            return None
+        if not fingerprint:
+            return None
+
+        key = (path, date_range)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                return entry[1]
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = self._loading[key] = Future()
+                loading = True
+            else:
+                loading = False
+
+        # A carga roda fora da trava: outros conjuntos continuam sendo servidos
+        if not loading:
+            return pending.result()
+
+        analyzer = None
+        try:
+            # Representação compacta para reduzir a memória por worker
+            analyzer = Analyzer(path, compact=True, date_range=date_range)
+            if not analyzer.load_data():
+                analyzer = None
+        finally:
+            with self._lock:
+                if analyzer is not None:
+                    self._entries[key] = (fingerprint, analyzer)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                del self._loading[key]
+            pending.set_result(analyzer)
+        return analyzer
+
+    def clear(self):
+        """Descarta todos os dados em cache"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Instância única por processo
+_store = DatasetStore(max_entries=int(os.getenv('DATASET_STORE_MAX_ENTRIES', '4')))
+
+
+def get_analyzer(data_path, date_range=None):
+    """Atalho para o Analyzer compartilhado do processo"""
+    return _store.get_analyzer(data_path, date_range)
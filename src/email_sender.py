@@ -1,11 +1,134 @@
 import smtplib
 import os
+import threading
+import time
+import uuid
+from collections import deque
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 from datetime import datetime
 
+from src.tracing import span
+
+# Tempo máximo (segundos) de cada operação SMTP
+SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', '30'))
+
+
+class SMTPConnectionPool:
+    """Mantém uma conexão SMTP autenticada por servidor e remetente
+    
+    A conexão é reaproveitada entre envios (verificada com NOOP) e o método
+    de conexão com que um envio deu certo para cada domínio é tentado
+    primeiro nas próximas vezes.
+    """
+    
+    METHODS = ('starttls', 'ssl', 'sem_autenticacao')
+    
+    def __init__(self, timeout=SMTP_TIMEOUT):
+        self.timeout = timeout
+        self._connections = {}
+        self._locks = {}
+        self._methods = {}
+        self._lock = threading.Lock()
+    
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def _open(self, method, server, port, sender_email, sender_password):
+        if method == 'ssl':
+            # Método 2: SMTP_SSL direto
+            connection = smtplib.SMTP_SSL(server, 465, timeout=self.timeout)
+        else:
+            # Método 1: SMTP com STARTTLS; método 3: sem autenticação (para testes)
+            connection = smtplib.SMTP(server, port, timeout=self.timeout)
+        try:
+            if method != 'ssl':
+                connection.starttls()
+            if method != 'sem_autenticacao':
+                connection.login(sender_email, sender_password)
+        except Exception:
+            # O handshake falhou: fecha o socket já aberto antes de tentar o próximo método
+            try:
+                connection.close()
+            except Exception:
+                pass
+            raise
+        return connection
+    
+    @staticmethod
+    def _domain(sender_email):
+        return sender_email.split('@')[-1].lower()
+    
+    def _connect(self, server, port, sender_email, sender_password):
+        """Abre uma conexão pelo primeiro método que funcionar; retorna (conexão, método)"""
+        preferred = self._methods.get(self._domain(sender_email))
+        methods = ([preferred] if preferred else []) + [m for m in self.METHODS if m != preferred]
+        
+        last_error = None
+        for method in methods:
+            try:
+                return self._open(method, server, port, sender_email, sender_password), method
+            except Exception as e:
+                last_error = e
+        raise last_error
+    
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            return connection.noop()[0] == 250
+        except Exception:
+            return False
+    
+    def send(self, server, port, sender_email, sender_password, msg):
+        """Envia a mensagem, reconectando uma vez se a conexão guardada tiver caído"""
+        key = (server, port, sender_email)
+        with self._key_lock(key):
+            connection = self._connections.get(key)
+            if connection is not None and not self._is_alive(connection):
+                self._discard(key)
+                connection = None
+            
+            if connection is not None:
+                try:
+                    connection.send_message(msg)
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    self._discard(key)
+            
+            connection, method = self._connect(server, port, sender_email, sender_password)
+            self._connections[key] = connection
+            try:
+                connection.send_message(msg)
+            except Exception:
+                # Conexão que não entregou nada não fica guardada nem vira o método preferido
+                self._discard(key)
+                raise
+            self._methods[self._domain(sender_email)] = method
+    
+    def _discard(self, key):
+        connection = self._connections.pop(key, None)
+        if connection is not None:
+            try:
+                connection.quit()
+            except Exception:
+                pass
+    
+    def close_all(self):
+        """Encerra todas as conexões abertas"""
+        with self._lock:
+            keys = list(self._connections)
+        for key in keys:
+            with self._key_lock(key):
+                self._discard(key)
+
+
+# Conexões compartilhadas pelo processo
+smtp_pool = SMTPConnectionPool()
+
+
 class EmailSender:
     def __init__(self, smtp_server=None, smtp_port=587):
         self.smtp_server = smtp_server
@@ -27,15 +150,76 @@ class EmailSender:
         
         return smtp_configs.get(domain, ('smtp.office365.com', 587))
         
+    def resolve_credentials(self, sender_email=None, sender_password=None):
+        """Usa as variáveis de ambiente quando as credenciais não são informadas"""
+        return sender_email or os.getenv('EMAIL_SENDER'), sender_password or os.getenv('EMAIL_PASSWORD')
+    
+    def _build_body(self, summary_text):
+        return f"""
+Prezado(a),
+
+Segue em anexo o relatório de análise de reclamações gerado automaticamente pelo sistema.
+
+RESUMO EXECUTIVO:
+{summary_text[:500]}...
+
+O relatório completo está disponível no arquivo PDF em anexo.
+
+Atenciosamente,
+Sistema de Análise de Reclamações
+            """
+    
+    def deliver(self, pdf_path, summary_text, recipients, sender_email, sender_password):
+        """Monta e envia a mensagem pela conexão SMTP reaproveitada; lança exceção em caso de falha
+        
+        `recipients` pode ser um e-mail ou uma lista: todos recebem a mesma
+        mensagem, cada um em cópia oculta quando houver mais de um.
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        
+        # Configurar SMTP baseado no domínio se não especificado
+        smtp_server, smtp_port = self.smtp_server, self.smtp_port
+        if not smtp_server:
+            smtp_server, smtp_port = self._get_smtp_config(sender_email)
+        
+        # Criar mensagem
+        msg = MIMEMultipart()
+        msg['From'] = sender_email
+        if len(recipients) == 1:
+            msg['To'] = recipients[0]
+            msg['Cc'] = sender_email
+        else:
+            # Pedidos diferentes na mesma mensagem: o send_message entrega o Bcc e o remove do cabeçalho
+            msg['To'] = sender_email
+            msg['Bcc'] = ', '.join(recipients)
+        msg['Subject'] = f"Relatório de Reclamações - {datetime.now().strftime('%d/%m/%Y')}"
+        
+        # Corpo do e-mail
+        msg.attach(MIMEText(self._build_body(summary_text), 'plain', 'utf-8'))
+        
+        # Anexar PDF se existir
+        if pdf_path and os.path.exists(pdf_path):
+            with open(pdf_path, "rb") as attachment:
+                part = MIMEBase('application', 'octet-stream')
+                part.set_payload(attachment.read())
+            
+            encoders.encode_base64(part)
+            part.add_header(
+                'Content-Disposition',
+                f'attachment; filename= {os.path.basename(pdf_path)}'
+            )
+            msg.attach(part)
+        
+        with span('smtp.send', server=smtp_server, recipients=len(recipients)):
+            smtp_pool.send(smtp_server, smtp_port, sender_email, sender_password, msg)
+    
     def send_report_email(self, pdf_path, summary_text, recipient_email, 
                          sender_email=None, sender_password=None):
         """Envia o relatório por e-mail"""
         
         # Usar variáveis de ambiente se não fornecidas
-        if not sender_email:
-            sender_email = os.getenv('EMAIL_SENDER')
-        if not sender_password:
-            sender_password = os.getenv('EMAIL_PASSWORD')
+        sender_email, sender_password = self.resolve_credentials(sender_email, sender_password)
             
         # Verificar se é domínio corporativo com SMTP desabilitado
         if sender_email and 'compass.uol' in sender_email:
@@ -47,71 +231,8 @@ class EmailSender:
                 "error": "Credenciais de e-mail não configuradas. Configure EMAIL_SENDER e EMAIL_PASSWORD."
             }
         
-        # Configurar SMTP baseado no domínio se não especificado
-        if not self.smtp_server:
-            self.smtp_server, self.smtp_port = self._get_smtp_config(sender_email)
-        
         try:
-            # Criar mensagem
-            msg = MIMEMultipart()
-            msg['From'] = sender_email
-            msg['To'] = recipient_email
-            msg['Cc'] = sender_email
-            msg['Subject'] = f"Relatório de Reclamações - {datetime.now().strftime('%d/%m/%Y')}"
-            
-            # Corpo do e-mail
-            body = f"""
-Prezado(a),
-
-Segue em anexo o relatório de análise de reclamações gerado automaticamente pelo sistema.
-
-RESUMO EXECUTIVO:
-{summary_text[:500]}...
-
-O relatório completo está disponível no arquivo PDF em anexo.
-
-Atenciosamente,
-Sistema de Análise de Reclamações
-            """
-            
-            msg.attach(MIMEText(body, 'plain', 'utf-8'))
-            
-            # Anexar PDF se existir
-            if pdf_path and os.path.exists(pdf_path):
-                with open(pdf_path, "rb") as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(pdf_path)}'
-                )
-                msg.attach(part)
-            
-            # Tentar diferentes métodos de conexão
-            server = None
-            try:
-                # Método 1: SMTP com STARTTLS
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-                server.starttls()
-                server.login(sender_email, sender_password)
-            except Exception as e1:
-                try:
-                    # Método 2: SMTP_SSL direto
-                    if server:
-                        server.quit()
-                    server = smtplib.SMTP_SSL(self.smtp_server, 465)
-                    server.login(sender_email, sender_password)
-                except Exception as e2:
-                    # Método 3: SMTP sem autenticação (para testes)
-                    if server:
-                        server.quit()
-                    server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-                    server.starttls()
-            
-            server.send_message(msg)
-            server.quit()
+            self.deliver(pdf_path, summary_text, recipient_email, sender_email, sender_password)
             
             return {
                 "success": True,
@@ -119,24 +240,27 @@ Sistema de Análise de Reclamações
             }
             
         except Exception as e:
-            # Se falhar, salvar localmente como fallback
-            try:
-                fallback_file = f"email_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                with open(fallback_file, 'w', encoding='utf-8') as f:
-                    f.write(f"Para: {recipient_email}\n")
-                    f.write(f"Assunto: Relatório de Reclamações\n\n")
-                    f.write(body)
-                    f.write(f"\n\nPDF anexo: {pdf_path}")
-                
-                return {
-                    "success": False,
-                    "error": f"Erro no envio: {str(e)}. E-mail salvo em {fallback_file}"
-                }
-            except:
-                return {
-                    "success": False,
-                    "error": f"Erro ao enviar e-mail: {str(e)}"
-                }
+            return self.save_fallback(pdf_path, summary_text, recipient_email, e)
+    
+    def save_fallback(self, pdf_path, summary_text, recipient_email, error):
+        """Salva o e-mail localmente quando o envio falha"""
+        try:
+            fallback_file = f"email_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            with open(fallback_file, 'w', encoding='utf-8') as f:
+                f.write(f"Para: {recipient_email}\n")
+                f.write(f"Assunto: Relatório de Reclamações\n\n")
+                f.write(self._build_body(summary_text))
+                f.write(f"\n\nPDF anexo: {pdf_path}")
+            
+            return {
+                "success": False,
+                "error": f"Erro no envio: {str(error)}. E-mail salvo em {fallback_file}"
+            }
+        except:
+            return {
+                "success": False,
+                "error": f"Erro ao enviar e-mail: {str(error)}"
+            }
     
     def _simulate_email_send(self, pdf_path, summary_text, recipient_email, sender_email):
         """Simula envio de e-mail para domínios corporativos"""
@@ -184,4 +308,171 @@ PDF: {pdf_path if pdf_path else 'Não anexado'}
             return {
                 "success": False,
                 "error": f"Erro na simulação: {str(e)}"
-            }
\ No newline at end of file
+            }
+
+
+class EmailDeliveryQueue:
+    """Fila de envio de relatórios processada por uma thread em segundo plano
+    
+    `enqueue` retorna imediatamente um id de entrega. Pedidos do mesmo
+    relatório que chegam juntos viram uma única mensagem, com os
+    destinatários em cópia oculta; falhas são repetidas com espera
+    exponencial e, esgotadas as tentativas, o e-mail é salvo localmente
+    como antes. O `sender` precisa de resolve_credentials, deliver,
+    send_report_email e save_fallback (ver EmailSender).
+    """
+    
+    def __init__(self, sender=None, max_attempts=3, backoff_seconds=2.0, batch_window=0.5,
+                 retention_seconds=3600):
+        self.sender = sender or EmailSender()
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.batch_window = batch_window
+        self.retention_seconds = retention_seconds
+        self._pending = deque()
+        self._deliveries = {}
+        self._condition = threading.Condition()
+        self._worker = None
+    
+    def enqueue(self, pdf_path, summary_text, recipient_email):
+        """Agenda o envio e retorna o id da entrega"""
+        delivery_id = uuid.uuid4().hex
+        with self._condition:
+            self._purge_finished()
+            self._deliveries[delivery_id] = {
+                'id': delivery_id,
+                'status': 'pendente',
+                'recipient': recipient_email,
+                'attempts': 0,
+                'result': None,
+                'created_at': time.time(),
+                'finished_at': None,
+            }
+            self._pending.append((delivery_id, pdf_path, summary_text, recipient_email))
+            self._ensure_worker()
+            self._condition.notify_all()
+        return delivery_id
+    
+    def status(self, delivery_id):
+        """Retorna uma cópia do estado da entrega, ou None se não existir"""
+        with self._condition:
+            delivery = self._deliveries.get(delivery_id)
+            return dict(delivery) if delivery else None
+    
+    def wait(self, delivery_id, timeout=None):
+        """Bloqueia até a entrega terminar (ou o tempo acabar) e retorna seu estado"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                delivery = self._deliveries.get(delivery_id)
+                if delivery is None or delivery['finished_at']:
+                    return dict(delivery) if delivery else None
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return dict(delivery)
+                self._condition.wait(remaining)
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='email-delivery', daemon=True)
+            self._worker.start()
+    
+    def _next_batch(self):
+        """Espera um pedido e junta os do mesmo relatório que chegarem na janela"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            first = self._pending.popleft()
+        
+        if self.batch_window:
+            time.sleep(self.batch_window)
+        
+        batch = [first]
+        with self._condition:
+            remaining = deque()
+            for item in self._pending:
+                if item[1:3] == first[1:3]:
+                    batch.append(item)
+                else:
+                    remaining.append(item)
+            self._pending = remaining
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._deliver_batch(batch)
+            except Exception as e:
+                self._finish([item[0] for item in batch], {"success": False, "error": str(e)})
+    
+    def _deliver_batch(self, batch):
+        _, pdf_path, summary_text, _ = batch[0]
+        delivery_ids = [item[0] for item in batch]
+        recipients = list(dict.fromkeys(item[3] for item in batch))
+        self._update(delivery_ids, status='enviando')
+        
+        sender_email, sender_password = self.sender.resolve_credentials()
+        if not sender_email or not sender_password or 'compass.uol' in sender_email:
+            # Sem SMTP real: mantém o comportamento (simulação ou erro) do envio direto, pedido a pedido
+            self._update(delivery_ids, attempts=1)
+            for delivery_id, _, _, recipient_email in batch:
+                self._finish([delivery_id], self.sender.send_report_email(pdf_path, summary_text, recipient_email))
+            return
+        
+        for attempt in range(1, self.max_attempts + 1):
+            self._update(delivery_ids, attempts=attempt)
+            try:
+                self.sender.deliver(pdf_path, summary_text, recipients, sender_email, sender_password)
+                # Cada pedido só vê o próprio destinatário no estado da entrega
+                for delivery_id, _, _, recipient_email in batch:
+                    self._finish([delivery_id], {
+                        "success": True,
+                        "message": f"E-mail enviado com sucesso para {recipient_email}"
+                    })
+                return
+            except Exception as e:
+                error = e
+                if attempt < self.max_attempts:
+                    time.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+        
+        self._finish(delivery_ids, self.sender.save_fallback(
+            pdf_path, summary_text, ', '.join(recipients), error))
+    
+    def _update(self, delivery_ids, **fields):
+        with self._condition:
+            for delivery_id in delivery_ids:
+                if delivery_id in self._deliveries:
+                    self._deliveries[delivery_id].update(fields)
+    
+    def _finish(self, delivery_ids, result):
+        with self._condition:
+            for delivery_id in delivery_ids:
+                if delivery_id in self._deliveries:
+                    self._deliveries[delivery_id].update(
+                        status='enviado' if result.get('success') else 'erro',
+                        result=result, finished_at=time.time())
+            self._condition.notify_all()
+    
+    def _purge_finished(self):
+        now = time.time()
+        expired = [delivery_id for delivery_id, delivery in self._deliveries.items()
+                   if delivery['finished_at'] and now - delivery['finished_at'] > self.retention_seconds]
+        for delivery_id in expired:
+            del self._deliveries[delivery_id]
+
+
+_delivery_queue = None
+_delivery_queue_lock = threading.Lock()
+
+
+def get_delivery_queue():
+    """Fila de envio única do processo, configurada por EMAIL_MAX_ATTEMPTS e EMAIL_RETRY_SECONDS"""
+    global _delivery_queue
+    with _delivery_queue_lock:
+        if _delivery_queue is None:
+            _delivery_queue = EmailDeliveryQueue(
+                max_attempts=int(os.getenv('EMAIL_MAX_ATTEMPTS', '3')),
+                backoff_seconds=float(os.getenv('EMAIL_RETRY_SECONDS', '2')),
+            )
+        return _delivery_queue
@@ -0,0 +1,159 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from src.text_utils import fold_accents
+
+# Intenções em ordem de prioridade: quando a mensagem casa com várias, vale a primeira.
+# Palavras-chave sem acento e em minúsculas; "*" no fim casa qualquer continuação
+# da palavra e expressões com espaço casam palavras consecutivas.
+INTENT_KEYWORDS = [
+    ('saudacao', ['oi', 'oii', 'ola', 'hello', 'bom dia', 'boa tarde', 'boa noite']),
+    # Só pedidos explícitos de busca: "quantas reclamações estão pendentes?" continua em status
+    ('busca', ['reclamacao sobre', 'reclamacoes sobre', 'reclamacoes com', 'reclamacoes envolvendo',
+               'buscar', 'busque', 'procurar', 'procure', 'pesquisar', 'pesquise', 'mencion*']),
+    ('categorias', ['categoria', 'categorias', 'tipo', 'tipos', 'problema', 'problemas']),
+    ('status', ['resolvido', 'resolvida', 'resolvidos', 'resolvidas', 'status',
+                'pendente', 'pendentes', 'respondida', 'respondidas']),
+    # "ajud*" e "pode*" como o casamento por trecho original: "ajudar", "poderia", "podemos"
+    ('funcionalidades', ['funcionalidade', 'funcionalidades', 'funcao', 'funcoes', 'fazer', 'faz',
+                         'pode*', 'ajud*', 'sistema', 'usar']),
+    ('situacao', ['situacao', 'como esta', 'resumo', 'geral', 'panorama']),
+    ('melhorias', ['melhorar', 'melhoria', 'melhorias', 'resolver', 'solucao', 'solucoes',
+                   'recomendacao', 'recomendacoes', 'sugestao', 'sugestoes']),
+    ('relatorio', ['analisar', 'relatorio', 'relatorios', 'gerar', 'pdf', 'completo']),
+]
+
+# Marcadores que refinam a resposta dentro de uma intenção (não decidem a intenção).
+# "pendentes" inclui "não resolvido", então deve ser consultado antes de "resolvidos".
+TAG_KEYWORDS = {
+    'por_categoria': ['por categoria', 'por categorias'],
+    'resolucao': ['resolu*'],
+    'menos': ['menos', 'menor', 'baixa', 'minimo', 'pequena'],
+    'mais': ['mais', 'maior', 'alta', 'maximo', 'critica', 'problematica'],
+    'resolvidos': ['resolvido', 'resolvida', 'resolvidos', 'resolvidas', 'solucionado', 'solucionada'],
+    'pendentes': ['pendente', 'pendentes', 'nao resolvido', 'nao resolvida', 'nao resolvidos',
+                  'nao resolvidas', 'aberta', 'abertas', 'em aberto'],
+    'analise': ['analisar', 'relatorio', 'relatorios', 'gerar', 'pdf', 'email', 'e-mail', 'envie',
+                'enviar', 'detalhado'],
+}
+
+_WORD = re.compile(r'\w+(?:-\w+)*')
+
+# Fronteiras de palavra como na tokenização por _WORD ("e-mail" é uma palavra só)
+# e separador entre as palavras de uma expressão
+_START = r'(?<!\w)(?<!\w-)'
+_END = r'(?!-?\w)'
+_SEPARATOR = r'(?:(?!-\w)\W)+'
+
+Route = namedtuple('Route', ['intent', 'tags'])
+
+
+def _char_pattern(char):
+    return _SEPARATOR if char == ' ' else re.escape(char)
+
+
+def _trie_pattern(node):
+    """Alternância fatorada pelos prefixos comuns: o re testa cada trecho uma vez só"""
+    branches = [_char_pattern(char) + _trie_pattern(node[char]) for char in sorted(filter(None, node))]
+    if None in node:
+        # Fim de palavra-chave depois das continuações: a mais longa vence; "*" dispensa a fronteira
+        branches.append('' if node[None] else _END)
+    return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+
+
+class IntentRouter:
+    """Classifica mensagens com uma única expressão regular compilada
+
+    As palavras-chave viram uma alternância em forma de trie, sem
+    distinção de maiúsculas, e cada trecho casado leva direto aos seus
+    rótulos. Só mensagens com acento passam por fold_accents. As fronteiras
+    seguem a tokenização por palavras, então "oi" não casa dentro de "foi"
+    e "relatório" e "relatorio" são iguais.
+    """
+
+    def __init__(self, intent_keywords=INTENT_KEYWORDS, tag_keywords=TAG_KEYWORDS):
+        self._priority = {intent: index for index, (intent, _) in enumerate(intent_keywords)}
+        self._intents = frozenset(self._priority)
+        keywords = {}
+        for label, words in list(intent_keywords) + list(tag_keywords.items()):
+            for keyword in words:
+                keywords.setdefault((tuple(keyword.rstrip('*').split()), keyword.endswith('*')), set()).add(label)
+        self._keywords = keywords
+
+        trie = {}
+        for words, prefix in keywords:
+            node = trie
+            for char in ' '.join(words):
+                node = node.setdefault(char, {})
+            node[None] = prefix or node.get(None, False)
+        self._pattern = re.compile(_START + _trie_pattern(trie), re.IGNORECASE)
+        self._matches = {}
+        self._routes = {}
+
+    def _match_labels(self, text):
+        """Rótulos de um trecho casado, incluindo os das palavras-chave contidas nele
+
+        "não resolvido" também traz os rótulos de "resolvido", como se as
+        palavras tivessem sido lidas uma a uma.
+        """
+        labels = self._matches.get(text)
+        if labels is not None:
+            return labels
+        words = _WORD.findall(fold_accents(text.lower()))
+        labels = set()
+        for (keyword, prefix), keyword_labels in self._keywords.items():
+            size = len(keyword)
+            for start in range(len(words) - size + 1):
+                window = words[start:start + size]
+                if window[:-1] == list(keyword[:-1]) and (
+                        window[-1].startswith(keyword[-1]) if prefix else window[-1] == keyword[-1]):
+                    labels |= keyword_labels
+                    break
+        labels = frozenset(labels)
+        # Variações de grafia são poucas; o limite evita crescer com separadores arbitrários
+        if len(self._matches) < 4096:
+            self._matches[text] = labels
+        return labels
+
+    def _find(self, message):
+        """Trechos da mensagem que casam com alguma palavra-chave"""
+        if not message.isascii():
+            message = fold_accents(message)
+        return tuple(self._pattern.findall(message))
+
+    def labels(self, message):
+        """Conjunto de intenções e marcadores presentes na mensagem"""
+        found = set()
+        for text in self._find(message):
+            found |= self._match_labels(text)
+        return found
+
+    def route(self, message):
+        """Retorna Route(intenção, marcadores); a intenção é 'geral' se nada casar"""
+        # A rota só depende dos trechos casados, que se repetem muito entre mensagens
+        matches = self._find(message)
+        route = self._routes.get(matches)
+        if route is None:
+            found = set()
+            for text in matches:
+                found |= self._match_labels(text)
+            route = self._route_labels(found)
+            if len(self._routes) < 4096:
+                self._routes[matches] = route
+        return route
+
+    def _route_labels(self, found):
+        intents = found & self._intents
+        tags = frozenset(found - intents)
+        if 'por_categoria' in tags or ('categorias' in intents and 'resolucao' in tags):
+            return Route('resolucao_categoria', tags)
+        intent = min(intents, key=self._priority.__getitem__) if intents else 'geral'
+        return Route(intent, tags)
+
+
+# Roteador compartilhado pelo processo
+intent_router = IntentRouter()
+
+# Uma mensagem é roteada várias vezes por requisição (análise, regras, prompt, cache)
+route_message = lru_cache(maxsize=1024)(intent_router.route)
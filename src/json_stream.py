@@ -0,0 +1,116 @@
+import json
+
+
+class JsonArrayStream:
+    """Percorre um arquivo JSON de objeto e entrega um array de topo em lotes
+
+    Os demais campos de topo (ex: metadata) são decodificados normalmente e
+    ficam disponíveis em `fields` ao fim da leitura. Apenas um lote de
+    registros e um bloco de leitura ficam em memória por vez.
+    """
+
+    def __init__(self, file_path, array_key, batch_size=10000, read_size=1 << 20):
+        self.file_path = file_path
+        self.array_key = array_key
+        self.batch_size = batch_size
+        self.read_size = read_size
+        self.fields = {}
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        self.fields = {}
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            self._file = file
+            self._buffer = ''
+            self._pos = 0
+            self._eof = False
+            try:
+                yield from self._parse_object()
+            finally:
+                self._file = None
+
+    def _fill(self):
+        """Lê mais um bloco do arquivo, descartando o que já foi consumido"""
+        chunk = self._file.read(self.read_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Retorna o próximo caractere significativo sem consumi-lo"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("JSON incompleto: fim inesperado do arquivo")
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"JSON inválido: esperado '{char}', encontrado '{found}'")
+        self._pos += 1
+
+    def _decode_value(self):
+        """Decodifica o próximo valor, lendo mais blocos enquanto estiver incompleto"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # Um número no fim do bloco pode continuar no próximo
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _parse_object(self):
+        self._expect('{')
+        if self._peek() == '}':
+            return
+
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+            if key == self.array_key:
+                yield from self._parse_array()
+            else:
+                self.fields[key] = self._decode_value()
+
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect('}')
+            return
+
+    def _parse_array(self):
+        self._expect('[')
+        batch = []
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            batch.append(self._decode_value())
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect(']')
+            break
+
+        if batch:
+            yield batch
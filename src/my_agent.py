@@ -2,37 +2,36 @@
 from bedrock_agentcore import BedrockAgentCoreApp
 import sys
 import os
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente antes dos módulos que leem configurações na importação
+load_dotenv()
 
-from src.analyzer import Analyzer
+from src.bedrock_client import BedrockUnavailable, bedrock_metrics, create_bedrock_client, error_reason, run_blocking
+from src.dataset_store import get_analyzer
+from src.partitions import InvalidDateRange, parse_date_range, resolve_partitions
+from src.intent_router import route_message
+from src.prompt_builder import detect_intent, prompt_builder
+from src.response_cache import response_cache
+from src.tracing import collect_timings, record, span, traced
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-from email_sender import EmailSender
-import os
+from email_sender import get_delivery_queue
+import asyncio
+import contextvars
 import json
-from datetime import datetime
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-from dotenv import load_dotenv
-import boto3
-from botocore.exceptions import ClientError
-
-# Carregar variáveis de ambiente
-load_dotenv()
 
 # Configurar AWS com variáveis de ambiente
 aws_access_key = os.getenv('AWS_ACCESS_KEY_ID')
 aws_secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
 aws_region = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
 
-# Cliente Bedrock para IA (opcional)
-try:
-    bedrock_client = boto3.client(
-        'bedrock-runtime',
-        region_name=aws_region,
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key
-    ) if aws_access_key and aws_secret_key else boto3.client('bedrock-runtime', region_name=aws_region)
-except Exception:
-    bedrock_client = None  # Fallback para modo sem Bedrock
+# Cliente Bedrock para IA (opcional): pool de conexões, retry adaptativo e circuit breaker
+bedrock_client = create_bedrock_client(aws_region, aws_access_key, aws_secret_key)
 
 def make_json_serializable(obj):
     """Converte objetos para tipos serializáveis em JSON"""
@@ -55,112 +54,170 @@ def make_json_serializable(obj):
 
 app = BedrockAgentCoreApp()
 
-def get_ai_response(user_message, context_data=None):
-    """Gera resposta inteligente baseada nos dados"""
+def get_data_path():
+    """Arquivo, diretório ou glob com os dumps de reclamações (RECLAMACOES_DATA_PATH)"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    default_path = os.path.join(os.path.dirname(current_dir), "data")
+    return os.getenv('RECLAMACOES_DATA_PATH', default_path)
+
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+
+# Modelo usado nas respostas conversacionais
+MODEL_ID = 'amazon.nova-micro-v1:0'
+
+# Carga de dados e agregados (CPU) no servidor ASGI, fora do event loop e das threads do Bedrock
+analysis_executor = ThreadPoolExecutor(max_workers=int(os.getenv('ANALYSIS_WORKERS', '4')),
+                                       thread_name_prefix='analise')
+
+def _cache_key(user_message, context_data, dataset_version):
+    """Chave da resposta em cache e a intenção detectada na pergunta"""
+    intent = detect_intent(user_message)
+    if dataset_version is None:
+        # Sem versão explícita, os próprios dados enviados ao modelo identificam a versão
+        dataset_version = json.dumps(context_data, sort_keys=True, ensure_ascii=False, default=str)
+    return response_cache.make_key(user_message, intent, dataset_version), intent
+
+def _record_fallback(error):
+    """Registra por que a pergunta caiu nas respostas por regras"""
+    reason = error_reason(error)
+    if reason == 'circuit_open':
+        bedrock_metrics.record('circuit_open')
+        return
+    bedrock_metrics.record('rule_based', reason=reason)
+    if reason != 'sem_cliente':
+        print(f"Bedrock indisponível ({reason}); usando respostas por regras")
+
+def _cached_response(cache_key):
+    """Resposta já gerada para a pergunta, se houver"""
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        bedrock_metrics.record('cache')
+    return cached
+
+def _model_response(client, user_message, context_data, intent, cache_key):
+    """Consulta o Bedrock (bloqueante); em caso de falha, usa as respostas por regras"""
     try:
-        # Tentar usar Bedrock Claude primeiro
-        system_prompt = """
-Você é um assistente virtual especializado em analisar reclamações do Sicredi no site Reclame Aqui.  
-Seu objetivo é conversar de forma natural, amigável e útil, transformando dados em insights claros e práticos.
-
-🔹 ESTILO DE COMUNICAÇÃO
-- Seja conversacional e fluido, evitando parecer um manual técnico.
-- Traga explicações como se fosse uma pessoa próxima ajudando, não um robô.
-- Use linguagem clara, frases corridas e só use listas curtas quando realmente organizar melhor a informação.
-- Pode usar emojis com moderação para dar leveza.
-- Sempre ofereça próximos passos: "Quer que eu detalhe isso em relatório?", "Prefere que eu envie por e-mail?", "Posso mostrar os dados em gráfico, se quiser."
-
-🔹 O QUE VOCÊ CONSEGUE FAZER
-1. **Situação geral**
-   - Resumir o panorama atual das reclamações.
-   - Mostrar taxa de resolução, principais categorias, evolução ao longo do tempo.
-
-2. **Categorias**
-   - Identificar categorias mais críticas ou com menos problemas.
-   - Comparar categorias (ex: Cartão vs App).
-   - Explicar tendências em categorias específicas.
-
-3. **Status das reclamações**
-   - Quantas foram resolvidas, pendentes, não respondidas.
-   - Calcular taxa de resolução geral e por categoria.
-   - Indicar onde estão os gargalos.
-
-4. **Tendências e padrões**
-   - Mostrar evolução das reclamações ao longo do tempo.
-   - Identificar picos, sazonalidades ou quedas.
-   - Destacar mudanças recentes que merecem atenção.
-
-5. **Recomendações**
-   - Sugerir ações práticas de melhoria (atendimento, processos, canais).
-   - Propor metas realistas para aumentar a taxa de resolução.
-   - Apontar oportunidades de aprendizado com categorias que já têm bons resultados.
-
-6. **Relatórios**
-   - Gerar relatório em PDF com gráficos e análises detalhadas.
-   - Enviar relatório por e-mail, se solicitado.
-
-🔹 COMO RESPONDER
-- Quando pedirem situação geral → traga um resumo narrativo dos dados.
-- Quando perguntarem por categorias → explique a mais problemática e a mais tranquila, de forma comparativa.
-- Quando pedirem melhorias → sugira ações simples primeiro, depois estratégias mais avançadas.
-- Quando falarem em relatório ou PDF → explique que pode gerar e/ou enviar por e-mail.
-- Quando perguntarem “o que você pode fazer” → liste as principais capacidades de forma curta e simpática.
-- Se não houver dados carregados → explique que precisa analisar primeiro e oriente o usuário.
-
-🔹 TONS DE RESPOSTA (exemplos)
-- Saudação: "Oi! 👋 Tudo bem? Posso te mostrar como estão as reclamações do Sicredi no Reclame Aqui ou preparar uma análise mais detalhada."
-- Situação geral: "No momento temos X reclamações registradas. A categoria que mais preocupa é Y, enquanto Z é a mais tranquila. A taxa de resolução está em W%."
-- Categoria: "A categoria mais crítica é Cartão, com N casos, já a de menor incidência é PIX, com apenas M."
-- Melhoria: "Um bom caminho seria focar primeiro nos casos pendentes de Cartão, revisar o processo de atendimento e criar uma força-tarefa rápida. Quer que eu detalhe isso em um relatório?"
-- Relatório: "Posso gerar um relatório completo com gráficos e insights. Quer que eu crie em PDF ou prefira que eu envie direto para o seu e-mail?"
-
-Lembre-se: sempre soe como um analista próximo e colaborativo, e não como um chatbot genérico.
-"""
-        
-        context = ""
-        if context_data:
-            context = f"\n\nDados disponíveis: {json.dumps(context_data, indent=2, ensure_ascii=False)}"
+        # Tentar usar Bedrock primeiro
+        if client is None:
+            raise BedrockUnavailable('sem_cliente')
         
-        prompt = f"{system_prompt}\n\nPergunta do usuário: {user_message}{context}"
+        # Prompt de sistema no campo próprio e só o contexto relevante à pergunta
+        body, prompt_stats = prompt_builder.build_request_body(user_message, context_data, intent)
+        with span('bedrock.invoke_model', model=MODEL_ID, prompt_chars=prompt_stats['prompt_chars']):
+            response = client.invoke_model(modelId=MODEL_ID, body=body)
+            response_body = json.loads(response['body'].read())
+        prompt_builder.record_usage(prompt_stats['prompt_chars'],
+                                    response_body.get('usage', {}).get('inputTokens'))
+        text = response_body['output']['message']['content'][0]['text']
+        response_cache.put(cache_key, text)
+        bedrock_metrics.record('bedrock')
+        return text
         
-        if bedrock_client is None:
-            raise Exception("Bedrock client is not available.")
+    except Exception as e:
+        # Fallback para respostas baseadas em regras
+        _record_fallback(e)
+        return get_rule_based_response(user_message, context_data)
+
+def get_ai_response(user_message, context_data=None, client=None, dataset_version=None):
+    """Gera resposta inteligente baseada nos dados
+    
+    `client` substitui o cliente Bedrock do módulo (útil para testes com um stub).
+    Respostas do modelo ficam em cache enquanto a versão dos dados não muda.
+    """
+    client = client or bedrock_client
+    cache_key, intent = _cache_key(user_message, context_data, dataset_version)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return cached
+    return _model_response(client, user_message, context_data, intent, cache_key)
+
+async def get_ai_response_async(user_message, context_data=None, client=None, dataset_version=None):
+    """Versão assíncrona de get_ai_response
+    
+    Acertos do cache respondem direto no event loop; a chamada ao Bedrock
+    roda no executor do Bedrock e a pergunta espera sem prender o loop.
+    """
+    client = client or bedrock_client
+    cache_key, intent = _cache_key(user_message, context_data, dataset_version)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return cached
+    return await run_blocking(_model_response, client, user_message, context_data, intent, cache_key)
+
+def stream_ai_response(user_message, context_data=None, client=None, dataset_version=None):
+    """Versão em streaming de get_ai_response: gera os trechos de texto à medida que chegam
+    
+    Se o Bedrock falhar antes do primeiro trecho, gera a resposta baseada
+    em regras de uma vez só. Respostas em cache saem em um único trecho.
+    """
+    client = client or bedrock_client
+    cache_key, intent = _cache_key(user_message, context_data, dataset_version)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    chunks = []
+    try:
+        if client is None:
+            raise BedrockUnavailable('sem_cliente')
         
-        response = bedrock_client.invoke_model(
-            modelId='amazon.nova-micro-v1:0',
-            body=json.dumps({
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [{
-                            "text": prompt
-                        }]
-                    }
-                ],
-                "inferenceConfig": {
-                    "max_new_tokens": 1000,
-                    "temperature": 0.7
-                }
-            })
-        )
+        body, prompt_stats = prompt_builder.build_request_body(user_message, context_data, intent)
+        stream_start = time.perf_counter()
+        response = client.invoke_model_with_response_stream(modelId=MODEL_ID, body=body)
         
-        response_body = json.loads(response['body'].read())
-        return response_body['output']['message']['content'][0]['text']
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            message = json.loads(chunk['bytes'])
+            if 'metadata' in message:
+                prompt_builder.record_usage(prompt_stats['prompt_chars'],
+                                            message['metadata'].get('usage', {}).get('inputTokens'))
+            delta = message.get('contentBlockDelta', {}).get('delta', {})
+            if delta.get('text'):
+                chunks.append(delta['text'])
+                yield delta['text']
         
+        # Só respostas completas entram no cache
+        if chunks:
+            response_cache.put(cache_key, ''.join(chunks))
+        bedrock_metrics.record('bedrock')
+        record('bedrock.stream', time.perf_counter() - stream_start)
+                
     except Exception as e:
-        # Fallback para respostas baseadas em regras
-        return get_rule_based_response(user_message, context_data)
+        if not chunks:
+            _record_fallback(e)
+            yield get_rule_based_response(user_message, context_data)
+        else:
+            bedrock_metrics.record('bedrock', reason=f"stream_interrompido:{error_reason(e)}")
+            print(f"Streaming do Bedrock interrompido: {e}")
 
 def get_rule_based_response(user_message, context_data=None):
     """Respostas inteligentes baseadas em regras quando Bedrock não está disponível"""
-    msg_lower = user_message.lower()
+    # Intenção e marcadores em uma passada do roteador pré-compilado
+    intent, tags = route_message(user_message)
     
     # Saudações
-    if any(word in msg_lower for word in ['oi', 'olá', 'hello', 'bom dia', 'boa tarde']):
+    if intent == 'saudacao':
         return "Olá! Sou o agente de análise de reclamações do Sicredi. Posso ajudar com:\n\n📊 CONSULTAS:\n• Situação atual das reclamações\n• Categorias mais problemáticas\n• Status de resolução\n\n💡 ANÁLISES:\n• Insights e recomendações\n• Comparações entre categorias\n• Tendências e padrões\n\n📋 RELATÓRIOS:\n• Gerar análise completa em PDF\n• Enviar relatórios por email\n\nO que gostaria de saber?"
     
+    # Dados carregados, mas o período pedido não tem reclamações
+    if (context_data is not None and not context_data.get('total_reclamacoes')
+            and intent in ('resolucao_categoria', 'categorias', 'status', 'situacao')):
+        return "📭 Nenhuma reclamação encontrada no período solicitado. Tente um período maior."
+    
+    # Taxa de resolução / status por categoria
+    if intent == 'resolucao_categoria':
+        if context_data and context_data.get('resolucao_por_categoria'):
+            resolucao = context_data['resolucao_por_categoria']
+            linhas = "\n".join([f"• {categoria}: {dados['taxa_resolucao']:.1f}% ({dados['resolvidos']} de {dados['total']})" for categoria, dados in resolucao.items()])
+            pior = next(iter(resolucao.items()))
+            return f"📊 TAXA DE RESOLUÇÃO POR CATEGORIA:\n{linhas}\n\n⚠️ Menor taxa: {pior[0]} ({pior[1]['taxa_resolucao']:.1f}%)\n\nQuer um relatório completo por categoria?"
+        return "Para ver a taxa de resolução por categoria, digite 'analisar reclamações' para carregar os dados."
+    
     # Perguntas sobre categorias - mais inteligente
-    if any(word in msg_lower for word in ['categoria', 'tipo', 'problema']):
+    if intent == 'categorias':
         if context_data and 'categorias' in context_data:
             cats = context_data['categorias']
             if cats:
@@ -168,12 +225,12 @@ def get_rule_based_response(user_message, context_data=None):
                 sorted_cats = sorted(cats.items(), key=lambda x: x[1]['count'], reverse=True)
                 
                 # Detectar se pergunta é sobre "mais" ou "menos"
-                if any(word in msg_lower for word in ['menos', 'menor', 'baixa', 'mínimo', 'pequena']):
+                if 'menos' in tags:
                     # Categoria com MENOS reclamações
                     bottom_cat = sorted_cats[-1]  # Último da lista (menor)
                     return f"📉 CATEGORIA COM MENOS RECLAMAÇÕES:\n• {bottom_cat[0]}: {bottom_cat[1]['count']} casos ({bottom_cat[1]['percentage']}%)\n• Esta categoria está com baixa incidência\n• Pode indicar processo bem estruturado\n"
                 
-                elif any(word in msg_lower for word in ['mais', 'maior', 'alta', 'máximo', 'crítica', 'problemática']):
+                elif 'mais' in tags:
                     # Categoria com MAIS reclamações  
                     top_cat = sorted_cats[0]  # Primeiro da lista (maior)
                     return f"🎯 CATEGORIA COM MAIS RECLAMAÇÕES:\n• {top_cat[0]}: {top_cat[1]['count']} casos ({top_cat[1]['percentage']}%)\n• Requer atenção imediata\n• Categoria mais problemática identificada\n"
@@ -186,25 +243,26 @@ def get_rule_based_response(user_message, context_data=None):
         return "As principais categorias são: Cartão, App, PIX, Cobrança, Atendimento e Conta. Digite 'analisar reclamações' para ver detalhes completos."
     
     # Perguntas sobre status das reclamações
-    if any(word in msg_lower for word in ['resolvido', 'resolvida', 'status', 'pendente', 'respondida']):
+    if intent == 'status':
         if context_data and 'status' in context_data:
             status_data = context_data['status']
             if status_data:
                 sorted_status = sorted(status_data.items(), key=lambda x: x[1]['count'], reverse=True)
                 
-                if any(word in msg_lower for word in ['resolvido', 'resolvida', 'solucionado']):
+                # "não resolvidas" também cita "resolvidas": pendentes vem primeiro
+                if 'pendentes' in tags:
+                    nao_resolvidos = status_data.get('Não resolvido', {})
+                    nao_respondidas = status_data.get('Não respondida', {})
+                    total_pendentes = (nao_resolvidos.get('count', 0) + nao_respondidas.get('count', 0))
+                    return f"⚠️ RECLAMAÇÕES PENDENTES:\n• Não resolvidas: {nao_resolvidos.get('count', 0)} ({nao_resolvidos.get('percentage', 0)}%)\n• Não respondidas: {nao_respondidas.get('count', 0)} ({nao_respondidas.get('percentage', 0)}%)\n• Total pendente: {total_pendentes} casos\n• Prioridade: ALTA - Requer ação imediata!\n\nPrecisa de plano de ação?"
+                    
+                elif 'resolvidos' in tags:
                     resolvidos = status_data.get('Resolvido', {})
                     total = sum(s['count'] for s in status_data.values())
                     if resolvidos:
                         taxa = (resolvidos['count'] / total) * 100
                         return f"✅ RECLAMAÇÕES RESOLVIDAS:\n• Quantidade: {resolvidos['count']} casos\n• Percentual: {resolvidos['percentage']}%\n• Taxa geral: {taxa:.1f}% do total\n• Status: {'Excelente' if taxa > 80 else 'Crítico' if taxa < 50 else 'Regular'}\n\nQuer estratégias para melhorar?"
                     
-                elif any(word in msg_lower for word in ['pendente', 'não resolvido', 'aberta', 'em aberto']):
-                    nao_resolvidos = status_data.get('Não resolvido', {})
-                    nao_respondidas = status_data.get('Não respondida', {})
-                    total_pendentes = (nao_resolvidos.get('count', 0) + nao_respondidas.get('count', 0))
-                    return f"⚠️ RECLAMAÇÕES PENDENTES:\n• Não resolvidas: {nao_resolvidos.get('count', 0)} ({nao_resolvidos.get('percentage', 0)}%)\n• Não respondidas: {nao_respondidas.get('count', 0)} ({nao_respondidas.get('percentage', 0)}%)\n• Total pendente: {total_pendentes} casos\n• Prioridade: ALTA - Requer ação imediata!\n\nPrecisa de plano de ação?"
-                    
                 else:
                     # Resumo geral dos status
                     return f"📋 RESUMO DOS STATUS:\n" + "\n".join([f"• {status}: {data['count']} ({data['percentage']}%)" for status, data in sorted_status]) + f"\n\nTotal analisado: {sum(s['count'] for s in status_data.values())} reclamações"
@@ -212,14 +270,14 @@ def get_rule_based_response(user_message, context_data=None):
         return "Para ver o status das reclamações, digite 'analisar reclamações' para carregar os dados."
     
     # Perguntas sobre funcionalidades
-    if any(word in msg_lower for word in ['funcionalidade', 'função', 'fazer', 'pode', 'ajuda', 'sistema', 'usar']):
+    if intent == 'funcionalidades':
         if context_data:
             total = context_data.get('total_reclamacoes', 0)
             return f"🤖 SISTEMA DE ANÁLISE DE RECLAMAÇÕES SICREDI\n\n📊 DADOS DISPONÍVEIS:\n• {total} reclamações analisadas\n• Múltiplas categorias (App, Cartão, PIX, etc.)\n• Status de resolução detalhado\n\n🔍 O QUE POSSO FAZER:\n• Consultar situação atual\n• Identificar categorias críticas\n• Sugerir melhorias\n• Gerar relatórios PDF\n• Enviar análises por email\n\n💬 EXEMPLOS DE PERGUNTAS:\n• 'Qual a situação atual?'\n• 'Categoria mais problemática?'\n• 'Como melhorar o atendimento?'\n• 'Gerar relatório completo'\n\nO que gostaria de saber?"
         return "🤖 Sistema de análise de reclamações do Sicredi. Digite 'analisar reclamações' para carregar os dados e ver todas as funcionalidades disponíveis."
     
     # Perguntas sobre situação atual
-    if any(word in msg_lower for word in ['situação', 'status', 'como está', 'resumo', 'geral']):
+    if intent == 'situacao':
         if context_data:
             total = context_data.get('total_reclamacoes', 0)
             categorias = len(context_data.get('categorias', {}))
@@ -237,7 +295,7 @@ def get_rule_based_response(user_message, context_data=None):
         return "Para ver a situação atual, preciso analisar os dados. Digite 'analisar reclamações'."
     
     # Perguntas sobre melhorias
-    if any(word in msg_lower for word in ['melhorar', 'resolver', 'solução', 'como', 'recomendação', 'sugestão']):
+    if intent == 'melhorias':
         if context_data:
             status_data = context_data.get('status', {})
             cats = context_data.get('categorias', {})
@@ -247,8 +305,20 @@ def get_rule_based_response(user_message, context_data=None):
             return f"💡 RECOMENDAÇÕES ESTRATÉGICAS:\n\n🚨 AÇÕES IMEDIATAS:\n• Resolver {nao_resolvidos} casos pendentes\n• Força-tarefa para categoria {categoria_critica}\n• SLA de 48h para novas reclamações\n\n🔧 MELHORIAS DE PROCESSO:\n• Revisar fluxo de {categoria_critica.lower()}\n• Treinamento específico da equipe\n• Automatizar respostas padrão\n\n📊 MONITORAMENTO:\n• Dashboard em tempo real\n• Alertas automáticos\n• Relatórios semanais\n\n🎯 META: Elevar resolução para >80% em 30 dias\n\nQuer o plano detalhado em PDF?"
         return "💡 Para recomendações específicas, preciso analisar os dados primeiro. Digite 'analisar reclamações'."
     
+    # Busca por assunto, categoria, status e período
+    if intent == 'busca':
+        if context_data and context_data.get('busca'):
+            busca = context_data['busca']
+            if not busca['total']:
+                return "🔎 Nenhuma reclamação encontrada com esses critérios. Tente outras palavras ou um período maior."
+            distribuicao = "\n".join([f"• {categoria}: {count}" for categoria, count in busca['por_categoria'].items()])
+            status = "\n".join([f"• {nome}: {count}" for nome, count in busca['por_status'].items()])
+            exemplos = "\n".join([f"• {amostra['data']} [{amostra['categoria']}] {amostra['titulo']} ({amostra['status']})" for amostra in busca['amostras'][:3]])
+            return f"🔎 {busca['total']} RECLAMAÇÕES ENCONTRADAS\n\n📂 POR CATEGORIA:\n{distribuicao}\n\n📋 POR STATUS:\n{status}\n\n📝 MAIS RECENTES:\n{exemplos}\n\nQuer refinar por categoria, status ou período?"
+        return "Para buscar reclamações, digite 'analisar reclamações' para carregar os dados."
+    
     # Comandos de análise
-    if any(word in msg_lower for word in ['analisar', 'relatório', 'gerar', 'pdf', 'completo']):
+    if intent == 'relatorio':
         return "📋 ANÁLISE COMPLETA DISPONÍVEL:\n\n🔍 O QUE SERÁ GERADO:\n• Estatísticas detalhadas por categoria\n• Gráficos de distribuição\n• Análise de tendências temporais\n• Insights estratégicos com IA\n• Recomendações de melhoria\n• Relatório PDF profissional\n\n⚡ OPÇÕES:\n• 'Gerar relatório' - PDF local\n• 'Enviar para email@exemplo.com' - PDF por email\n• 'Análise rápida' - Apenas insights\n\nQual opção prefere?"
     
     # Resposta padrão (fallback) - deve ficar no final
@@ -259,41 +329,116 @@ def get_rule_based_response(user_message, context_data=None):
     
 
 
+def detect_analysis_request(user_message, recipient_email=None):
+    """Indica se a mensagem pede análise/relatório e extrai o e-mail citado, se houver"""
+    # Verificar se é pergunta conversacional ou comando de análise
+    is_analysis_request = 'analise' in route_message(user_message).tags
+    
+    # Extrair email da mensagem se mencionado
+    if not recipient_email and '@' in user_message:
+        email_match = EMAIL_PATTERN.search(user_message)
+        if email_match:
+            recipient_email = email_match.group()
+            is_analysis_request = True  # Forçar análise quando email é mencionado
+    
+    return is_analysis_request, recipient_email
+
+@traced('agent.load_context')
+def load_context(payload):
+    """Carrega o Analyzer do payload e os agregados usados como contexto da IA
+    
+    Lança InvalidDateRange se data_inicio/data_fim não formarem um período válido.
+    """
+    json_file_path = get_data_path()
+    context_data = None
+    
+    # Período opcional: dumps fora dele nem chegam a ser lidos
+    date_range = parse_date_range(payload.get("data_inicio"), payload.get("data_fim"))
+    
+    # Analyzer compartilhado: o JSON só é relido quando algum arquivo muda
+    analyzer = get_analyzer(json_file_path, date_range) if resolve_partitions(json_file_path) else None
+    if analyzer is not None:
+        context_data = {
+            "total_reclamacoes": analyzer.data['metadata']['total_reclamacoes'] if analyzer.data is not None else 0,
+            "categorias": analyzer.analyze_categories(),
+            "status": analyzer.analyze_status(),
+            "resolucao_por_categoria": analyzer.get_resolution_by_category()
+        }
+        # Perguntas de busca levam ao modelo o resultado do índice de texto
+        user_message = payload.get("prompt", "")
+        if route_message(user_message).intent == 'busca':
+            context_data["busca"] = analyzer.search_message(user_message)
+    return analyzer, context_data
+
+def invoke_stream(payload, client=None):
+    """Responde uma pergunta em streaming, gerando trechos de texto
+    
+    Pedidos de relatório não são transmitidos: devem passar por invoke.
+    """
+    user_message = payload.get("prompt", "")
+    analyzer, context_data = load_context(payload)
+    dataset_version = analyzer.fingerprint() if analyzer is not None else None
+    yield from stream_ai_response(user_message, context_data, client, dataset_version)
+
+async def _load_context_async(payload):
+    """load_context e a versão dos dados, calculados no executor de análise"""
+    def load():
+        analyzer, context_data = load_context(payload)
+        return context_data, analyzer.fingerprint() if analyzer is not None else None
+    
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(analysis_executor, context.run, load)
+
+async def invoke_stream_async(payload, client=None):
+    """Versão assíncrona de invoke_stream: cada trecho é esperado no executor do Bedrock"""
+    user_message = payload.get("prompt", "")
+    context_data, dataset_version = await _load_context_async(payload)
+    stream = stream_ai_response(user_message, context_data, client, dataset_version)
+    done = object()
+    while True:
+        text = await run_blocking(next, stream, done)
+        if text is done:
+            return
+        yield text
+
 @app.entrypoint
-def invoke(payload):
-    """Agente de IA para análise inteligente de reclamações"""
+def invoke(payload, progress=None):
+    """Agente de IA para análise inteligente de reclamações
+    
+    `progress`, se informado, é chamado como progress(percentual, etapa)
+    durante a geração do relatório (usado pelos jobs assíncronos do web chat).
+    Com "include_timings" no payload, a resposta traz a duração de cada etapa.
+    """
+    with collect_timings(bool(payload.get("include_timings"))) as timings:
+        with span('invoke'):
+            result = _invoke(payload, progress)
+    if timings is not None and isinstance(result, dict):
+        result["timings"] = timings
+    return result
+
+def _invoke(payload, progress=None):
     user_message = payload.get("prompt", "Analisar reclamações")
     recipient_email = payload.get("email", None)
+    report_progress = progress or (lambda percent, stage: None)
     
     # Carregar dados para contexto da IA
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    json_file_path = os.path.join(os.path.dirname(current_dir), "data", "reclamacoes_20251001_220605.json")
-    context_data = None
+    json_file_path = get_data_path()
+    try:
+        analyzer, context_data = load_context(payload)
+    except InvalidDateRange as e:
+        return {"result": f"Erro: {e}", "status": "error"}
     
-    if os.path.exists(json_file_path):
-        analyzer = Analyzer(json_file_path)
-        if analyzer.load_data():
-            context_data = {
-                "total_reclamacoes": analyzer.data['metadata']['total_reclamacoes'] if analyzer.data is not None else 0,
-                "categorias": analyzer.analyze_categories(),
-                "status": analyzer.analyze_status()
-            }
+    dataset_version = analyzer.fingerprint() if analyzer is not None else None
     
-    # Verificar se é pergunta conversacional ou comando de análise
-    analysis_keywords = ['analisar', 'relatório', 'gerar', 'pdf', 'email', 'envie', 'enviar', 'detalhado']
-    is_analysis_request = any(keyword in user_message.lower() for keyword in analysis_keywords)
+    is_analysis_request, recipient_email = detect_analysis_request(user_message, recipient_email)
     
-    # Extrair email da mensagem se mencionado
-    if not recipient_email and '@' in user_message:
-        import re
-        email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', user_message)
-        if email_match:
-            recipient_email = email_match.group()
-            is_analysis_request = True  # Forçar análise quando email é mencionado
+    if not is_analysis_request and payload.get("stream"):
+        # O AgentCore devolve geradores como text/event-stream
+        return stream_ai_response(user_message, context_data, dataset_version=dataset_version)
     
     if not is_analysis_request:
         # Resposta conversacional com IA
-        ai_response = get_ai_response(user_message, context_data)
+        ai_response = get_ai_response(user_message, context_data, dataset_version=dataset_version)
         return {
             "response": ai_response,
             "status": "conversational",
@@ -301,42 +446,36 @@ def invoke(payload):
         }
     
     try:
-        # Caminho para o arquivo JSON
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        json_file_path = os.path.join(os.path.dirname(current_dir), "data", "reclamacoes_20251001_220605.json")
-        
         # Verificar se o arquivo existe
-        if not os.path.exists(json_file_path):
+        if not resolve_partitions(json_file_path):
             return {
                 "result": "Erro: Arquivo de reclamações não encontrado.",
                 "status": "error"
             }
         
-        # Criar instância do analisador
-        analyzer = Analyzer(json_file_path)
-        
-        # Carregar os dados
-        if not analyzer.load_data():
+        # Reaproveitar os dados já carregados para o contexto
+        if analyzer is None:
             return {
                 "result": "Erro ao carregar os dados do arquivo JSON.",
                 "status": "error"
             }
+        if not analyzer.data['metadata']['total_reclamacoes']:
+            return {
+                "result": "Nenhuma reclamação encontrada no período solicitado.",
+                "status": "error"
+            }
         
         # Gerar resumo textual
+        report_progress(20, "Gerando resumo")
         summary = analyzer.generate_summary_text()
         
-        # Gerar relatório em PDF
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        pdf_filename = f"relatorio_reclamacoes_{timestamp}.pdf"
-        
-        # O analyzer já vai salvar na pasta results automaticamente
-        pdf_success = analyzer.generate_pdf_report(pdf_filename)
-        
-        # Ajustar o caminho do arquivo para referência completa
-        if pdf_success:
-            pdf_full_path = os.path.join(os.path.dirname(current_dir), "results", pdf_filename)
+        # Gerar relatório em PDF (reaproveitado enquanto os dados não mudarem)
+        report_progress(40, "Gerando gráficos e PDF")
+        pdf_full_path = analyzer.get_or_generate_pdf_report()
+        pdf_success = pdf_full_path is not None
         
         # Obter estatísticas detalhadas
+        report_progress(80, "Calculando insights")
         categoria_analysis = analyzer.analyze_categories()
         status_analysis = analyzer.analyze_status() or {}
         trends = analyzer.analyze_trends()
@@ -355,6 +494,7 @@ def invoke(payload):
             "trends": trends_serializable,
             "pdf_generated": pdf_success,
             "pdf_filename": pdf_full_path if pdf_success else None,
+            "memory_footprint": analyzer.memory_footprint(),
             "status": "success"
         }
         
@@ -399,16 +539,19 @@ def invoke(payload):
         
         result["ai_insights"] = ai_insights
         
-        # Enviar por e-mail se solicitado
+        # Enviar por e-mail se solicitado (em segundo plano; a resposta não espera o SMTP)
         if recipient_email:
-            email_sender = EmailSender()
-            email_result = email_sender.send_report_email(
-                pdf_full_path if pdf_success else None,
-                summary,
-                recipient_email
-            )
-            result["email_sent"] = email_result["success"]
-            result["email_message"] = email_result.get("message", email_result.get("error"))
+            report_progress(90, "Agendando envio do e-mail")
+            with span('email.enqueue'):
+                delivery_id = get_delivery_queue().enqueue(
+                    pdf_full_path if pdf_success else None,
+                    summary,
+                    recipient_email
+                )
+            result["email_queued"] = True
+            result["email_delivery_id"] = delivery_id
+            result["email_sent"] = False
+            result["email_message"] = f"E-mail para {recipient_email} na fila de envio"
         
         return result
         
@@ -418,15 +561,41 @@ def invoke(payload):
             "status": "error"
         }
 
+async def invoke_async(payload, client=None):
+    """Versão assíncrona de invoke para o servidor ASGI
+    
+    Perguntas esperam pelo Bedrock sem ocupar o event loop; pedidos de
+    relatório (CPU) rodam inteiros no executor de análise.
+    """
+    user_message = payload.get("prompt", "Analisar reclamações")
+    is_analysis_request, _ = detect_analysis_request(user_message, payload.get("email"))
+    if is_analysis_request:
+        return await asyncio.get_running_loop().run_in_executor(analysis_executor, invoke, payload)
+    
+    with collect_timings(bool(payload.get("include_timings"))) as timings:
+        with span('invoke'):
+            try:
+                context_data, dataset_version = await _load_context_async(payload)
+            except InvalidDateRange as e:
+                return {"result": f"Erro: {e}", "status": "error"}
+            ai_response = await get_ai_response_async(user_message, context_data, client, dataset_version)
+    result = {
+        "response": ai_response,
+        "status": "conversational",
+        "context_available": context_data is not None
+    }
+    if timings is not None:
+        result["timings"] = timings
+    return result
+
 def executar_analise_rapida(email_destinatario=None):
     """Execução rápida e limpa do sistema de análise"""
     print("🤖 AGENTE IA - ANÁLISE DE RECLAMAÇÕES SICREDI")
     print("=" * 60)
     
     # Verificar se o arquivo de dados existe
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_file = os.path.join(os.path.dirname(current_dir), "data", "reclamacoes_20251001_220605.json")
-    if not os.path.exists(data_file):
+    data_file = get_data_path()
+    if not resolve_partitions(data_file):
         print(f"Erro: Arquivo {data_file} nao encontrado!")
         return
     
@@ -446,6 +615,8 @@ def executar_analise_rapida(email_destinatario=None):
             print(f"   • Total de status analisados: {len(result['status_analysis'])}")
             print(f"   • PDF gerado: {result['pdf_filename']}")
             print(f"   • Período analisado: {result['trends']['date_range']['start']} a {result['trends']['date_range']['end']}")
+            if result.get('memory_footprint'):
+                print(f"   • Memória do dataset: {result['memory_footprint']['total_bytes'] / 1024:.1f} KB")
             
             # Mostrar insights principais
             print("\nCATEGORIAS MAIS PROBLEMATICAS:")
@@ -472,6 +643,11 @@ def executar_analise_rapida(email_destinatario=None):
             
             # Mostrar status do e-mail se enviado
             if email_destinatario:
+                # Na execução pela linha de comando, aguardar a entrega antes de sair
+                delivery = get_delivery_queue().wait(result.get('email_delivery_id'), timeout=300)
+                if delivery and delivery.get('result'):
+                    result['email_sent'] = delivery['result']['success']
+                    result['email_message'] = delivery['result'].get('message', delivery['result'].get('error'))
                 if result.get('email_sent'):
                     print(f"\n✅ E-mail enviado com sucesso para: {email_destinatario}")
                 else:
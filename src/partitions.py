@@ -0,0 +1,79 @@
+import glob
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+# Dumps diários seguem o padrão reclamacoes_AAAAMMDD_HHMMSS.json
+PARTITION_PATTERN = 'reclamacoes_*.json'
+_DUMP_DATE = re.compile(r'reclamacoes_(\d{8})(?:_(\d{6}))?\.json$')
+
+
+def resolve_partitions(data_path):
+    """Lista os arquivos de dados de um caminho (arquivo, diretório ou glob), do mais antigo ao mais novo"""
+    if os.path.isdir(data_path):
+        paths = glob.glob(os.path.join(data_path, PARTITION_PATTERN))
+    elif glob.has_magic(data_path):
+        paths = glob.glob(data_path)
+    else:
+        paths = [data_path] if os.path.exists(data_path) else []
+
+    return sorted((os.path.abspath(path) for path in paths),
+                  key=lambda path: (partition_date(path) or datetime.min, path))
+
+
+def partition_date(path):
+    """Data do dump a partir do nome do arquivo, ou None se o nome não seguir o padrão"""
+    match = _DUMP_DATE.search(os.path.basename(path))
+    if not match:
+        return None
+    return datetime.strptime(match.group(1) + (match.group(2) or '000000'), '%Y%m%d%H%M%S')
+
+
+class InvalidDateRange(ValueError):
+    """Período pedido com data ilegível ou com início depois do fim"""
+
+
+def parse_date_range(start, end):
+    """Valida data_inicio/data_fim vindos da requisição; retorna o período ou None se nenhum veio
+
+    Lança InvalidDateRange com uma mensagem que pode ser mostrada ao usuário.
+    """
+    if not start and not end:
+        return None
+    bounds = []
+    for name, value in (('data_inicio', start), ('data_fim', end)):
+        try:
+            bound = pd.Timestamp(value) if value else None
+        except (ValueError, TypeError):
+            bound = pd.NaT
+        if bound is pd.NaT:
+            raise InvalidDateRange(f"{name} inválida: {value!r} (use o formato AAAA-MM-DD)")
+        bounds.append(bound)
+    if bounds[0] is not None and bounds[1] is not None and bounds[0] > bounds[1]:
+        raise InvalidDateRange(f"data_inicio ({start}) é posterior a data_fim ({end})")
+    return tuple(bounds)
+
+
+def normalize_date_range(date_range):
+    """Converte (início, fim) em Timestamps; qualquer um dos limites pode ser None"""
+    if not date_range:
+        return None
+    start, end = date_range
+    return (pd.Timestamp(start) if start else None, pd.Timestamp(end) if end else None)
+
+
+def prune_partitions(paths, date_range):
+    """Descarta dumps que não podem conter reclamações do período
+
+    Um dump só contém reclamações até a sua data de extração; se ela é
+    anterior ao início do período, o arquivo inteiro pode ser ignorado.
+    """
+    date_range = normalize_date_range(date_range)
+    if not date_range or date_range[0] is None:
+        return list(paths)
+
+    start = date_range[0].normalize()
+    return [path for path in paths
+            if partition_date(path) is None or pd.Timestamp(partition_date(path)).normalize() >= start]
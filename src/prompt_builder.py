@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+
+from src.intent_router import route_message
+
+# Orçamento de tokens de entrada por chamada (prompt de sistema + pergunta + contexto)
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '1500'))
+
+# Estimativa inicial de caracteres por token, recalibrada com o uso medido pelo Bedrock
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+SYSTEM_PROMPT = """Você é um analista virtual das reclamações do Sicredi no Reclame Aqui. Converse de forma natural, próxima e útil, transformando dados em insights claros e práticos.
+
+Estilo: frases corridas, listas curtas só quando organizarem melhor, emojis com moderação. Sempre ofereça um próximo passo (detalhar em relatório PDF, enviar por e-mail, mostrar gráficos).
+
+Você consegue:
+1. Situação geral: panorama, taxa de resolução, principais categorias e evolução no tempo.
+2. Categorias: mais críticas e mais tranquilas, comparações e tendências.
+3. Status: resolvidas, pendentes e não respondidas; taxa de resolução geral e por categoria; gargalos.
+4. Tendências: picos, sazonalidades, quedas e mudanças recentes.
+5. Recomendações: ações práticas primeiro, depois estratégias; metas realistas; aprender com as categorias que vão bem.
+6. Relatórios: gerar PDF com gráficos e análises e enviar por e-mail.
+7. Busca: quantas reclamações citam um assunto (com categoria, status e período) e exemplos delas.
+
+Como responder:
+- Situação geral: resumo narrativo dos números.
+- Categorias: a mais problemática e a mais tranquila, comparando.
+- Melhorias: ações simples primeiro, depois mais avançadas.
+- Relatório/PDF: explique que pode gerar e/ou enviar por e-mail.
+- Busca: informe o total encontrado, como ele se divide e cite um ou dois exemplos.
+- "O que você pode fazer": capacidades de forma curta e simpática.
+- Sem dados carregados: explique que precisa analisar primeiro e oriente o usuário.
+
+Use apenas os números dos dados fornecidos. Soe como um analista colaborativo, não como um chatbot genérico."""
+
+# Agregados enviados ao modelo para cada intenção, em ordem de importância
+INTENT_CONTEXT = {
+    'saudacao': ['total_reclamacoes'],
+    'resolucao_categoria': ['total_reclamacoes', 'resolucao_por_categoria'],
+    'categorias': ['total_reclamacoes', 'categorias'],
+    'status': ['total_reclamacoes', 'status'],
+    'funcionalidades': ['total_reclamacoes'],
+    'situacao': ['total_reclamacoes', 'status', 'categorias'],
+    'melhorias': ['total_reclamacoes', 'resolucao_por_categoria', 'status', 'categorias'],
+    'relatorio': ['total_reclamacoes'],
+    'busca': ['busca', 'total_reclamacoes'],
+    'geral': ['total_reclamacoes', 'categorias', 'status', 'resolucao_por_categoria'],
+}
+
+
+def detect_intent(user_message):
+    """Classifica a pergunta em uma das intenções de INTENT_CONTEXT"""
+    return route_message(user_message).intent
+
+
+# Tamanho máximo da descrição de cada exemplo da busca enviado ao modelo
+SEARCH_SAMPLE_CHARS = 160
+
+
+def _format_search(result, max_items=None):
+    """Resultado de Analyzer.search: filtros, total, distribuição e exemplos, uma linha cada"""
+    consulta = result['consulta']
+    periodo = f"{consulta['inicio'] or '...'} a {consulta['fim'] or '...'}" if consulta['inicio'] or consulta['fim'] else None
+    filtros = [f"{name}={value}" for name, value in (
+        ('termos', consulta['termos']),
+        ('categoria', consulta['categoria']),
+        ('status', ', '.join(consulta['status']) if consulta['status'] else None),
+        ('periodo', periodo)) if value]
+    lines = [
+        f"busca ({'; '.join(filtros) or 'sem filtros'}): {result['total']} reclamações",
+        "busca por categoria: " + '; '.join(f"{name} {count}" for name, count in result['por_categoria'].items()),
+        "busca por status: " + '; '.join(f"{name} {count}" for name, count in result['por_status'].items()),
+    ]
+    amostras = result['amostras'] if max_items is None else result['amostras'][:max_items]
+    for amostra in amostras:
+        descricao = (amostra['descricao'] or '')[:SEARCH_SAMPLE_CHARS]
+        lines.append(f"exemplo: {amostra['data']} [{amostra['categoria']}/{amostra['status']}] "
+                     f"{amostra['titulo']}: {descricao}")
+    return "\n".join(lines)
+
+
+def _format_section(key, value, max_items=None):
+    """Serializa um agregado em uma linha compacta (bem menor que JSON indentado)"""
+    if key == 'total_reclamacoes':
+        return f"total_reclamacoes: {value}"
+    if key == 'busca':
+        return _format_search(value, max_items)
+
+    items = list(value.items())
+    if key in ('categorias', 'status'):
+        # Maiores primeiro, para o corte por orçamento descartar as menores
+        items.sort(key=lambda item: item[1]['count'], reverse=True)
+    if max_items is not None and len(items) > max_items:
+        omitted = len(items) - max_items
+        items = items[:max_items]
+    else:
+        omitted = 0
+
+    if key == 'resolucao_por_categoria':
+        header = "resolucao_por_categoria (taxa%, resolvidos/total)"
+        parts = [f"{name} {data['taxa_resolucao']:.1f}% {data['resolvidos']}/{data['total']}" for name, data in items]
+    else:
+        header = f"{key} (qtd, %)"
+        parts = [f"{name} {data['count']} {data['percentage']}%" for name, data in items]
+    if omitted:
+        parts.append(f"+{omitted} outros")
+    return f"{header}: {'; '.join(parts)}"
+
+
+class PromptBuilder:
+    """Monta o corpo da chamada ao Nova com o contexto mínimo para a pergunta
+
+    O prompt de sistema vai no campo `system`; o contexto inclui só os
+    agregados da intenção detectada, em formato compacto, e é cortado até
+    caber em `token_budget`. A razão caracteres/token é recalibrada com os
+    tokens de entrada que o Bedrock informa em cada resposta.
+    """
+
+    def __init__(self, token_budget=PROMPT_TOKEN_BUDGET, system_prompt=SYSTEM_PROMPT):
+        self.token_budget = token_budget
+        self.system_prompt = system_prompt
+        self._lock = threading.Lock()
+        self._measured_chars = 0
+        self._measured_tokens = 0
+        self.requests = 0
+        self.truncated = 0
+
+    @property
+    def chars_per_token(self):
+        with self._lock:
+            if self._measured_tokens:
+                return self._measured_chars / self._measured_tokens
+        return DEFAULT_CHARS_PER_TOKEN
+
+    def estimate_tokens(self, text):
+        return int(len(text) / self.chars_per_token) + 1
+
+    def build_user_text(self, user_message, context_data=None, intent=None):
+        """Pergunta mais o contexto relevante; retorna (texto, intenção, houve_corte)"""
+        intent = intent or detect_intent(user_message)
+        question = f"Pergunta do usuário: {user_message}"
+        if not context_data:
+            return question, intent, False
+
+        keys = [key for key in INTENT_CONTEXT.get(intent, INTENT_CONTEXT['geral']) if context_data.get(key)]
+        available = self.token_budget - self.estimate_tokens(self.system_prompt) - self.estimate_tokens(question)
+        max_items = None
+        truncated = False
+
+        while True:
+            sections = [_format_section(key, context_data[key], max_items) for key in keys]
+            text = question + "\n\nDados disponíveis:\n" + "\n".join(sections)
+            if not sections or self.estimate_tokens("\n".join(sections)) <= available:
+                return (text if sections else question), intent, truncated
+
+            truncated = True
+            if max_items is None:
+                max_items = max((len(context_data[key]) for key in keys if key != 'total_reclamacoes'), default=0)
+            if max_items > 3:
+                # Primeiro reduz as listas, mantendo os itens maiores
+                max_items -= 1
+            else:
+                # Depois descarta os agregados menos importantes para a intenção
+                keys = keys[:-1]
+
+    def build_request_body(self, user_message, context_data=None, intent=None,
+                           max_new_tokens=1000, temperature=0.7):
+        """Corpo JSON para invoke_model/invoke_model_with_response_stream e o tamanho medido"""
+        user_text, intent, truncated = self.build_user_text(user_message, context_data, intent)
+        with self._lock:
+            self.requests += 1
+            self.truncated += int(truncated)
+
+        body = json.dumps({
+            "system": [{"text": self.system_prompt}],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [{
+                        "text": user_text
+                    }]
+                }
+            ],
+            "inferenceConfig": {
+                "max_new_tokens": max_new_tokens,
+                "temperature": temperature
+            }
+        })
+        prompt_chars = len(self.system_prompt) + len(user_text)
+        stats = {
+            'intent': intent,
+            'prompt_chars': prompt_chars,
+            'estimated_tokens': self.estimate_tokens(self.system_prompt) + self.estimate_tokens(user_text),
+            'truncated': truncated,
+        }
+        return body, stats
+
+    def record_usage(self, prompt_chars, input_tokens):
+        """Registra os tokens de entrada medidos pelo Bedrock para calibrar a estimativa"""
+        if not input_tokens:
+            return
+        with self._lock:
+            self._measured_chars += prompt_chars
+            self._measured_tokens += input_tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'truncated': self.truncated,
+                'measured_input_tokens': self._measured_tokens,
+                'chars_per_token': round(self._measured_chars / self._measured_tokens, 2)
+                if self._measured_tokens else DEFAULT_CHARS_PER_TOKEN,
+                'token_budget': self.token_budget,
+            }
+
+
+# Instância compartilhada pelo processo
+prompt_builder = PromptBuilder()
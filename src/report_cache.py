@@ -0,0 +1,75 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+# Incrementar quando o layout do PDF mudar, invalidando relatórios já gerados
+REPORT_FORMAT_VERSION = 2
+REPORT_PREFIX = 'relatorio_reclamacoes_'
+
+# Limites do diretório de relatórios (configuráveis por variável de ambiente)
+MAX_REPORTS = int(os.getenv('REPORT_CACHE_MAX_FILES', '50'))
+MAX_REPORTS_BYTES = int(os.getenv('REPORT_CACHE_MAX_MB', '200')) * 1024 * 1024
+MAX_REPORT_AGE_SECONDS = int(os.getenv('REPORT_CACHE_MAX_AGE_HOURS', '168')) * 3600
+
+
+def report_key(dataset_fingerprint, options=None):
+    """Chave do relatório: hash da versão dos dados mais as opções do relatório"""
+    payload = json.dumps([REPORT_FORMAT_VERSION, dataset_fingerprint, options or {}],
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def report_filename(key):
+    return f"{REPORT_PREFIX}{key[:16]}.pdf"
+
+
+def touch(path):
+    """Marca o relatório como usado agora (a remoção segue o uso mais recente)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict_reports(results_dir, max_files=None, max_bytes=None, max_age_seconds=None, keep=()):
+    """Remove relatórios antigos até respeitar os limites de idade, quantidade e tamanho
+
+    Os relatórios usados há mais tempo saem primeiro; caminhos em `keep`
+    nunca são removidos. Retorna a lista de arquivos apagados.
+    """
+    max_files = MAX_REPORTS if max_files is None else max_files
+    max_bytes = MAX_REPORTS_BYTES if max_bytes is None else max_bytes
+    max_age_seconds = MAX_REPORT_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+    keep = {os.path.abspath(path) for path in keep}
+
+    reports = []
+    for path in glob.glob(os.path.join(results_dir, f"{REPORT_PREFIX}*.pdf")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        reports.append((stat.st_mtime, stat.st_size, os.path.abspath(path)))
+
+    # Mais recentes primeiro
+    reports.sort(reverse=True)
+    now = time.time()
+    removed = []
+    kept_files = 0
+    kept_bytes = 0
+
+    for mtime, size, path in reports:
+        expired = now - mtime > max_age_seconds
+        over_limit = kept_files + 1 > max_files or kept_bytes + size > max_bytes
+        if path not in keep and (expired or over_limit):
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                pass
+            continue
+        kept_files += 1
+        kept_bytes += size
+
+    return removed
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Fila de relatórios cheia; o cliente deve tentar novamente mais tarde"""
+
+
+class ReportJobManager:
+    """Executa a geração de relatórios em segundo plano, com fila limitada
+
+    Cada job recebe um id consultável enquanto roda (status, progresso e
+    etapa atual) e guarda o resultado ao terminar. Jobs finalizados são
+    descartados depois de `retention_seconds`.
+    """
+
+    def __init__(self, run_report, max_workers=2, max_pending=20, retention_seconds=3600):
+        self._run_report = run_report
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report-job')
+        self._max_pending = max_pending
+        self._retention_seconds = retention_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, payload):
+        """Agenda um relatório e retorna o id do job"""
+        with self._lock:
+            self._purge_finished()
+            pending = sum(1 for job in self._jobs.values() if job['status'] in ('pendente', 'executando'))
+            if pending >= self._max_pending:
+                raise QueueFullError("Muitos relatórios em andamento. Tente novamente em instantes.")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': 'pendente',
+                'progress': 0,
+                'stage': 'Na fila',
+                'result': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None,
+            }
+
+        self._executor.submit(self._run, job_id, payload)
+        return job_id
+
+    def _run(self, job_id, payload):
+        self._update(job_id, status='executando', progress=5, stage='Carregando dados')
+        try:
+            result = self._run_report(payload, progress=lambda percent, stage: self._update(
+                job_id, progress=percent, stage=stage))
+            self._update(job_id, status='concluido', progress=100, stage='Concluído',
+                         result=result, finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, status='erro', stage='Falhou', error=str(e), finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        """Retorna uma cópia do estado do job, ou None se não existir"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _purge_finished(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] and now - job['finished_at'] > self._retention_seconds]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def create_job_manager(run_report):
+    """Gerenciador configurado por REPORT_JOB_WORKERS e REPORT_JOB_MAX_PENDING"""
+    return ReportJobManager(
+        run_report,
+        max_workers=int(os.getenv('REPORT_JOB_WORKERS', '2')),
+        max_pending=int(os.getenv('REPORT_JOB_MAX_PENDING', '20')),
+    )
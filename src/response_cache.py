@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from src.text_utils import fold_accents
+
+# Palavras que não mudam o sentido da pergunta para fins de cache
+FILLER_WORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'na', 'no',
+    'nas', 'nos', 'para', 'pra', 'por', 'qual', 'quais', 'que', 'como', 'esta', 'estao', 'sao',
+    'me', 'voce', 'pode', 'poderia', 'favor', 'mostre', 'mostrar', 'diga', 'fale',
+    'atual', 'atualmente', 'agora', 'hoje', 'ai', 'la', 'ola', 'oi', 'sobre',
+}
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_message(text):
+    """Forma canônica da pergunta: sem acentos, pontuação e palavras de ligação
+
+    As palavras restantes são ordenadas, então "qual a situação atual?",
+    "situação atual" e "como está a situação" geram a mesma chave.
+    """
+    words = _NON_WORD.sub(' ', fold_accents(text.lower())).split()
+    return ' '.join(sorted({word for word in words if word not in FILLER_WORDS}))
+
+
+class ResponseCache:
+    """Cache LRU com expiração das respostas do modelo, opcionalmente persistido em disco
+
+    A chave combina a pergunta normalizada, a intenção detectada e a versão
+    dos dados, então uma resposta só é reaproveitada enquanto o dataset não
+    muda e dentro de `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def make_key(user_message, intent, dataset_version):
+        payload = json.dumps([normalize_message(user_message), intent, dataset_version], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"resposta_{key}.json")
+
+    def _is_fresh(self, created_at):
+        return time.time() - created_at <= self.ttl_seconds
+
+    def get(self, key):
+        """Retorna o texto da resposta ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                # A cópia em disco tem a mesma idade: também expirou
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+
+        entry = self._read_disk(key)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, entry)
+            return entry[1]
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), encoding='utf-8') as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if not self._is_fresh(stored['created_at']):
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+            with self._lock:
+                self.expired += 1
+            return None
+        return stored['created_at'], stored['response']
+
+    def put(self, key, response):
+        entry = (time.time(), response)
+        with self._lock:
+            self._store(key, entry)
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as file:
+                    json.dump({'created_at': entry[0], 'response': response}, file, ensure_ascii=False)
+                os.replace(tmp_path, self._disk_path(key))
+            except OSError as e:
+                print(f"Não foi possível gravar a resposta em cache: {e}")
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Cache compartilhado pelo processo; RESPONSE_CACHE_DIR ativa a cópia em disco
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256')),
+    ttl_seconds=int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600')),
+    disk_dir=os.getenv('RESPONSE_CACHE_DIR') or None,
+)
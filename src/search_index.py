@@ -0,0 +1,368 @@
+import re
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.term_index import STOPWORDS, tokenize
+from src.text_utils import fold_accents
+
+# Reclamações indexadas por vez na montagem inicial (limita a memória dos pares termo-reclamação)
+BUILD_BATCH = 250_000
+
+MONTHS = {'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7,
+          'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12}
+
+# Palavras do pedido de busca que não são termos a procurar
+QUERY_WORDS = {'reclamacao', 'reclamacoes', 'sobre', 'busca', 'buscar', 'busque', 'procurar', 'procure',
+               'pesquisar', 'pesquise', 'quantas', 'quantos', 'mostre', 'mostrar', 'liste', 'listar',
+               'exemplo', 'exemplos', 'caso', 'casos', 'cliente', 'clientes', 'mencionam', 'mencionando',
+               'citam', 'falam', 'envolvendo', 'relacionadas', 'houve', 'existem', 'mes', 'ano', 'dia', 'dias',
+               'semana', 'semanas', 'ultimo', 'ultimos', 'ultima', 'ultimas', 'periodo', 'pendente', 'pendentes',
+               'hoje', 'ontem'}
+
+_YEAR = re.compile(r'\b(20\d\d)\b')
+_LAST_DAYS = re.compile(r'\bultim[oa]s?\s+(\d+)\s+(dia|dias|semana|semanas|mes|meses)\b')
+_LAST_PERIOD = re.compile(r'\bultim[oa]\s+(semana|mes)\b')
+
+
+def stem(word):
+    """Radical simplificado de uma palavra sem acento: plural e gênero não diferenciam termos
+
+    "encontrado", "encontrada" e "encontrados" viram "encontrad";
+    "cartão" e "cartões" viram "carta"; "travando" e "trava" viram "trav".
+    """
+    if len(word) <= 3:
+        return word
+    if len(word) > 6 and word.endswith(('ando', 'endo', 'indo')):
+        return word[:-4]
+    for suffix, replacement in (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el')):
+        if word.endswith(suffix):
+            word = word[:-len(suffix)] + replacement
+            break
+    else:
+        if word.endswith('s'):
+            word = word[:-1]
+    if len(word) > 3 and word[-1] in 'aoe':
+        word = word[:-1]
+    return word
+
+
+def query_terms(text):
+    """Radicais buscáveis de um texto (sem palavras vazias, números e letras soltas)"""
+    terms = []
+    for word in tokenize(text):
+        folded = fold_accents(word)
+        if len(folded) > 1 and not folded.isdigit() and folded not in STOPWORDS:
+            terms.append(stem(folded))
+    return terms
+
+
+def _day_number(value):
+    """Dias desde 1970-01-01, a mesma escala da coluna de datas do índice"""
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+
+def _values(column, ids):
+    return column if ids is None else column[ids]
+
+
+def _combine(mask, condition):
+    return condition if mask is None else mask & condition
+
+
+class SearchIndex:
+    """Índice invertido de títulos e descrições para buscas por palavra-chave
+
+    Cada radical aponta para um array numpy ordenado com as posições das
+    reclamações que o citam; categoria, status e dia ficam em colunas de
+    códigos para filtrar o resultado. Lotes anexados recebem posições
+    maiores que as existentes, então entram como caudas das listas (já
+    ordenadas) e só são concatenados quando o termo é consultado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.size = 0
+        self.categories = []
+        self.statuses = []
+        self._terms = {}
+        self._postings = []
+        self._tails = {}
+        self._columns = {'categoria': [], 'status': [], 'data': []}
+
+    @classmethod
+    def from_frame(cls, df, descricoes=None):
+        index = cls()
+        # Descrições que não acompanham o DataFrame (ex: cache sem elas) ficam fora do índice
+        if descricoes is not None and len(descricoes) != len(df):
+            descricoes = None
+        for start in range(0, len(df), BUILD_BATCH):
+            end = start + BUILD_BATCH
+            index.add_frame(df.iloc[start:end], descricoes.iloc[start:end] if descricoes is not None else None)
+        index._compact()
+        return index
+
+    def add_frame(self, df, descricoes=None):
+        """Indexa um lote de reclamações, na sequência das já indexadas"""
+        if df is None or df.empty:
+            return
+        if descricoes is None:
+            descricoes = df.get('descricao')
+
+        with self._lock:
+            base = self.size
+            pairs = [self._field_pairs(df['titulo'], base)] if 'titulo' in df.columns else []
+            if descricoes is not None and len(descricoes) == len(df):
+                pairs.append(self._field_pairs(descricoes, base))
+            if pairs and sum(len(part) for part in pairs):
+                # Os pares já vêm em trechos crescentes (um por texto): a ordenação estável os aproveita
+                keys = np.sort(np.concatenate(pairs), kind='stable')
+                # Termo citado no título e na descrição conta uma vez por reclamação
+                self._add_postings(keys[np.concatenate(([True], keys[1:] != keys[:-1]))])
+
+            self._columns['categoria'].append(self._codes(df['categoria'], self.categories))
+            self._columns['status'].append(self._codes(df['status'], self.statuses))
+            self._columns['data'].append(df['data'].to_numpy('datetime64[D]').astype(np.int64))
+            self.size += len(df)
+
+    def _codes(self, values, names):
+        """Códigos dos valores na lista `names`, que ganha os valores novos"""
+        known = set(names)
+        names.extend(value for value in pd.unique(values.dropna()) if value not in known)
+        return pd.Categorical(values, categories=names).codes.astype(np.int16)
+
+    def _stem_ids(self, text):
+        """Códigos (sem repetição) dos radicais de um texto, criando os novos"""
+        ids = set()
+        for term in query_terms(text):
+            term_id = self._terms.get(term)
+            if term_id is None:
+                term_id = self._terms[term] = len(self._postings)
+                self._postings.append(np.empty(0, dtype=np.int32))
+            ids.add(term_id)
+        return ids
+
+    def _field_pairs(self, texts, base):
+        """Pares (termo << 32 | posição) de uma coluna de textos, sem percorrer linha a linha"""
+        text_codes, uniques = pd.factorize(texts)
+        terms_per_text = [sorted(self._stem_ids(str(text))) for text in uniques]
+
+        # Linhas agrupadas por texto: as do texto i ocupam order[starts[i]:starts[i] + counts[i]]
+        valid = np.flatnonzero(text_codes >= 0)
+        order = valid[np.argsort(text_codes[valid], kind='stable')]
+        counts = np.bincount(text_codes[valid], minlength=len(uniques))
+        starts = np.cumsum(counts) - counts
+
+        lengths = np.fromiter((len(terms) for terms in terms_per_text), dtype=np.int64, count=len(uniques))
+        pair_text = np.repeat(np.arange(len(uniques)), lengths)
+        pair_term = np.fromiter((term for terms in terms_per_text for term in terms), dtype=np.int64,
+                                count=int(lengths.sum()))
+
+        # Um par para cada (termo do texto, linha com o texto)
+        repeats = counts[pair_text]
+        pair = np.repeat(np.arange(len(pair_text)), repeats)
+        position = np.arange(len(pair)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        rows = order[starts[pair_text[pair]] + position] + base
+        return (pair_term[pair] << 32) | rows
+
+    def _add_postings(self, keys):
+        """Distribui pares ordenados entre as listas dos termos"""
+        if not len(keys):
+            return
+        terms = keys >> 32
+        rows = (keys & 0xFFFFFFFF).astype(np.int32)
+        bounds = np.flatnonzero(np.diff(terms)) + 1
+        for term, postings in zip(terms[np.concatenate(([0], bounds))], np.split(rows, bounds)):
+            if len(self._postings[term]):
+                self._tails.setdefault(int(term), []).append(postings)
+            else:
+                self._postings[term] = postings
+
+    def _compact(self):
+        """Junta as caudas às listas e os lotes das colunas (chamado sob a trava ou na montagem)"""
+        for term, tails in self._tails.items():
+            self._postings[term] = np.concatenate([self._postings[term]] + tails)
+        self._tails = {}
+        for name, chunks in self._columns.items():
+            if len(chunks) > 1:
+                self._columns[name] = [np.concatenate(chunks)]
+
+    def _posting(self, term):
+        term_id = self._terms.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int32)
+        tails = self._tails.pop(term_id, None)
+        if tails:
+            self._postings[term_id] = np.concatenate([self._postings[term_id]] + tails)
+        return self._postings[term_id]
+
+    def _column(self, name):
+        chunks = self._columns[name]
+        if len(chunks) > 1:
+            self._columns[name] = chunks = [np.concatenate(chunks)]
+        return chunks[0] if chunks else np.empty(0, dtype=np.int64)
+
+    def _code(self, value, names):
+        """Código de uma categoria ou status, sem diferenciar maiúsculas e acentos"""
+        folded = fold_accents(str(value).lower())
+        for code, name in enumerate(names):
+            if fold_accents(str(name).lower()) == folded:
+                return code
+        # -1 é o código dos valores ausentes: um nome desconhecido não encontra nada
+        return -2
+
+    def search(self, terms=(), categoria=None, status=None, start=None, end=None):
+        """Posições (ordenadas) das reclamações que citam todos os termos e atendem aos filtros
+
+        `status` aceita um valor ou uma lista; `start` e `end` são datas inclusivas.
+        """
+        with self._lock:
+            # A interseção começa pela lista mais curta e busca seus elementos nas demais
+            postings = sorted((self._posting(term) for term in set(terms)), key=len)
+            ids = postings[0] if postings else None
+            for other in postings[1:]:
+                if not len(ids):
+                    break
+                found = np.minimum(np.searchsorted(other, ids), len(other) - 1)
+                ids = ids[other[found] == ids]
+
+            columns = {name: self._column(name) for name in self._columns}
+        # Sem termos, os filtros valem sobre todas as reclamações
+        mask = None
+        if categoria is not None:
+            mask = _combine(mask, _values(columns['categoria'], ids) == self._code(categoria, self.categories))
+        if status is not None:
+            # Tabela código -> aceito; a posição extra no fim atende o código -1 (ausente)
+            accepted = np.zeros(len(self.statuses) + 1, dtype=bool)
+            for value in ([status] if isinstance(status, str) else status):
+                code = self._code(value, self.statuses)
+                if code >= 0:
+                    accepted[code] = True
+            mask = _combine(mask, accepted[_values(columns['status'], ids)])
+        if start is not None:
+            mask = _combine(mask, _values(columns['data'], ids) >= _day_number(start))
+        if end is not None:
+            mask = _combine(mask, _values(columns['data'], ids) <= _day_number(end))
+
+        if mask is None:
+            return ids if ids is not None else np.arange(len(columns['data']), dtype=np.int32)
+        return ids[mask] if ids is not None else np.flatnonzero(mask).astype(np.int32)
+
+    def facets(self, ids):
+        """Contagem do resultado por categoria e por status, das maiores para as menores"""
+        result = {}
+        for name, names in (('categoria', self.categories), ('status', self.statuses)):
+            with self._lock:
+                codes = self._column(name)[ids]
+            counts = np.bincount(codes, minlength=len(names))
+            ranked = sorted(((names[code], int(count)) for code, count in enumerate(counts) if count),
+                            key=lambda item: item[1], reverse=True)
+            result[name] = dict(ranked)
+        return result
+
+    def latest(self, ids, limit):
+        """As `limit` reclamações mais recentes do resultado (as anexadas por último desempatam)"""
+        with self._lock:
+            days = self._column('data')[ids]
+        if len(ids) > limit:
+            picked = np.argpartition(-days, limit - 1)[:limit] if limit > 0 else np.empty(0, dtype=np.int64)
+            ids, days = ids[picked], days[picked]
+        return ids[np.lexsort((-ids, -days))]
+
+    def last_day(self):
+        """Último dia com reclamações indexadas"""
+        with self._lock:
+            days = self._column('data')
+        return (date(1970, 1, 1) + timedelta(days=int(days.max()))) if len(days) else None
+
+
+def _word_stems(text):
+    """Radicais de todas as palavras do texto, inclusive as vazias ("não" conta em "não resolvido")"""
+    return [stem(fold_accents(word)) for word in tokenize(text)]
+
+
+def _match_names(stems, names):
+    """Nomes (categorias ou status) citados na sequência de radicais; apaga as palavras usadas
+
+    Nomes mais longos são procurados primeiro: "não resolvido" antes de "resolvido".
+    """
+    found = []
+    phrases = sorted(((_word_stems(str(name)), name) for name in names), key=lambda item: len(item[0]), reverse=True)
+    for phrase, name in phrases:
+        size = len(phrase)
+        for start in range(len(stems) - size + 1) if size else ():
+            if stems[start:start + size] == phrase:
+                found.append(name)
+                stems[start:start + size] = [None] * size
+                break
+    return found
+
+
+def parse_query(message, categories, statuses, last_day=None):
+    """Converte uma pergunta em filtros de busca
+
+    "reclamações sobre PIX não encontrado em setembro" vira
+    {'query': 'encontrado', 'categoria': 'PIX', 'start': 1º/set, 'end': 30/set}.
+    Meses sem ano se referem ao último ano com aquele mês até `last_day`.
+    """
+    folded = fold_accents(message.lower())
+    words = tokenize(message)
+    stems = _word_stems(message)
+    filters = {}
+
+    statuses_found = _match_names(stems, statuses)
+    if not statuses_found and re.search(r'\bpendentes?\b', folded):
+        statuses_found = [name for name in statuses if fold_accents(str(name).lower()).startswith('nao ')]
+    if statuses_found:
+        filters['status'] = statuses_found
+
+    categories_found = _match_names(stems, categories)
+    if categories_found:
+        filters['categoria'] = categories_found[0]
+
+    filters.update(_parse_period(folded, last_day))
+
+    # O que sobra (fora palavras vazias, meses e o próprio pedido de busca) são os termos
+    ignored = {stem(word) for word in MONTHS} | {stem(word) for word in QUERY_WORDS}
+    keywords = [word for word, value in zip(words, stems)
+                if value is not None and value not in ignored and query_terms(word)]
+    if keywords:
+        filters['query'] = ' '.join(keywords)
+    return filters
+
+
+def _parse_period(folded, last_day):
+    """Período citado na pergunta: hoje/ontem, "últimos N dias/semanas/meses", meses ou ano
+
+    Os períodos relativos contam a partir do último dia com reclamações (o "hoje" dos dados).
+    """
+    last_day = last_day or date.today()
+    if re.search(r'\bontem\b', folded):
+        return {'start': last_day - timedelta(days=1), 'end': last_day - timedelta(days=1)}
+    if re.search(r'\bhoje\b', folded):
+        return {'start': last_day, 'end': last_day}
+
+    match = _LAST_DAYS.search(folded)
+    single = _LAST_PERIOD.search(folded)
+    if match or single:
+        amount, unit = (int(match.group(1)), match.group(2)) if match else (1, single.group(1))
+        days = amount * (7 if unit.startswith('semana') else 30 if unit.startswith('mes') else 1)
+        return {'start': last_day - timedelta(days=days - 1), 'end': last_day}
+
+    months = [MONTHS[word] for word in re.findall(r'[a-z]+', folded) if word in MONTHS]
+    year_match = _YEAR.search(folded)
+    if not months:
+        if year_match:
+            year = int(year_match.group(1))
+            return {'start': date(year, 1, 1), 'end': date(year, 12, 31)}
+        return {}
+
+    first, last = min(months), max(months)
+    if year_match:
+        year = int(year_match.group(1))
+    else:
+        year = last_day.year if first <= last_day.month else last_day.year - 1
+    end = date(year + (last == 12), last % 12 + 1, 1) - timedelta(days=1)
+    return {'start': date(year, first, 1), 'end': end}
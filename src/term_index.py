@@ -0,0 +1,220 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.text_utils import fold_accents
+
+# Palavras sem acento ignoradas como termo isolado e nas pontas das expressões
+STOPWORDS = frozenset("""
+a o as os e de da do das dos em no na nos nas num numa um uma uns umas ao aos
+para pra pro por pelo pela pelos pelas com sem que se ou nem mas mais menos ja
+nao sim so tambem ainda ate apos desde sobre entre quando como onde porque pois
+qual quais quem isso isto esse essa esses essas este esta estes estas aquele aquela
+nesse nessa neste nesta desse dessa deste desta disso disto aquilo
+eu me mim meu minha meus minhas voce voces ele ela eles elas lhe lhes nos seu sua seus suas
+foi fui era sao ser sido sendo seja estou estao estava estive tem tenho tive tinha ter ha
+vai vou fiz faz vez vezes muito muita muitos muitas todo toda todos todas tudo nada
+outro outra outros outras mesmo mesma la aqui ai entao
+""".split())
+
+# Palavras: letras e dígitos, sem o sublinhado
+_TOKEN = re.compile(r'[^\W_]+')
+
+# Campos de texto indexados, na ordem do código guardado na tabela
+FIELDS = ('titulo', 'descricao')
+
+
+def tokenize(text):
+    """Palavras do texto em minúsculas (com acento), na ordem em que aparecem"""
+    return _TOKEN.findall(text.lower())
+
+
+class TermIndex:
+    """Frequência de termos (palavras e expressões) de títulos e descrições
+
+    Cada texto distinto é tokenizado uma única vez; as contagens ficam numa
+    tabela longa (campo, categoria, dia, termo, ocorrências) de códigos
+    numpy, então as consultas por categoria e período são somas vetorizadas
+    sobre essa tabela, sem voltar às reclamações. Termos são comparados sem
+    acento ("não" e "nao" são o mesmo termo) e exibidos na grafia mais comum.
+    """
+
+    def __init__(self, terms, sizes, categories, dates, table):
+        self.terms = terms
+        self.sizes = sizes
+        self.categories = categories
+        self.dates = dates
+        self.table = table
+
+    @classmethod
+    def from_frame(cls, df, descricoes=None, max_ngram=3, stopwords=STOPWORDS):
+        """Monta o índice a partir do DataFrame (e das descrições guardadas fora dele)"""
+        builder = _TermBuilder(max_ngram, stopwords)
+        categoria_codes, categories = pd.factorize(df['categoria'], sort=True)
+        date_codes, dates = pd.factorize(df['data'].dt.normalize(), sort=True)
+
+        fields = {'titulo': df.get('titulo'), 'descricao': descricoes if descricoes is not None else df.get('descricao')}
+        parts = []
+        for field_code, field in enumerate(FIELDS):
+            texts = fields[field]
+            # Coluna ausente (ex: cache sem descrições) não entra no índice
+            if texts is None or len(texts) != len(df) or not len(texts):
+                continue
+            parts.append(builder.count(field_code, texts, categoria_codes, date_codes))
+
+        table = {column: np.concatenate([part[column] for part in parts]) if parts else np.empty(0, dtype=np.int32)
+                 for column in ('field', 'categoria', 'data', 'term', 'count')}
+        terms, sizes = builder.vocabulary()
+        return cls(terms, sizes, np.asarray(categories, dtype=object), pd.DatetimeIndex(dates), table)
+
+    def _mask(self, field=None, categoria=None, start=None, end=None, ngram=None):
+        """Linhas da tabela que atendem aos filtros (None = sem filtro)"""
+        table = self.table
+        mask = np.ones(len(table['term']), dtype=bool)
+        if field is not None:
+            mask &= table['field'] == FIELDS.index(field)
+        if categoria is not None:
+            codes = np.flatnonzero(self.categories == categoria)
+            mask &= table['categoria'] == (codes[0] if len(codes) else -1)
+        if start is not None or end is not None:
+            days = np.ones(len(self.dates), dtype=bool)
+            if start is not None:
+                days &= self.dates >= pd.Timestamp(start)
+            if end is not None:
+                days &= self.dates <= pd.Timestamp(end)
+            mask &= days[table['data']]
+        if ngram is not None:
+            sizes = self.sizes[table['term']]
+            if isinstance(ngram, int):
+                mask &= sizes == ngram
+            else:
+                mask &= (sizes >= ngram[0]) & (sizes <= ngram[1])
+        return mask
+
+    def _ranked(self, mask, n):
+        """Os `n` termos mais frequentes entre as linhas selecionadas"""
+        counts = np.bincount(self.table['term'][mask], weights=self.table['count'][mask], minlength=len(self.terms))
+        n = min(n, int(np.count_nonzero(counts)))
+        if n <= 0:
+            return {}
+        top = np.argpartition(-counts, n - 1)[:n]
+        # Empates em ordem alfabética, para o resultado não depender da ordem de carga
+        top = sorted(top, key=lambda term: (-counts[term], self.terms[term]))
+        return {self.terms[term]: int(counts[term]) for term in top}
+
+    def top_terms(self, n=10, **filters):
+        """Termos mais frequentes: {termo: ocorrências}
+
+        Filtros: field ('titulo' ou 'descricao'), categoria, start/end (datas)
+        e ngram (tamanho da expressão, ou intervalo (mín, máx)).
+        """
+        return self._ranked(self._mask(**filters), n)
+
+    def top_terms_by_category(self, n=5, **filters):
+        """Termos mais frequentes de cada categoria: {categoria: {termo: ocorrências}}"""
+        mask = self._mask(**filters)
+        result = {}
+        for code, categoria in enumerate(self.categories):
+            ranked = self._ranked(mask & (self.table['categoria'] == code), n)
+            if ranked:
+                result[categoria] = ranked
+        return result
+
+    def top_terms_by_period(self, freq='W', n=5, **filters):
+        """Termos mais frequentes por período ('D', 'W', 'M'...): {período: {termo: ocorrências}}"""
+        mask = self._mask(**filters)
+        period_codes, periods = pd.factorize(self.dates.to_period(freq), sort=True)
+        rows_period = period_codes[self.table['data']]
+        result = {}
+        for code, period in enumerate(periods):
+            ranked = self._ranked(mask & (rows_period == code), n)
+            if ranked:
+                result[str(period)] = ranked
+        return result
+
+
+class _TermBuilder:
+    """Vocabulário compartilhado entre os campos e contagem vetorizada dos termos"""
+
+    def __init__(self, max_ngram, stopwords):
+        self.max_ngram = max_ngram
+        self.stopwords = stopwords
+        self._ids = {}
+        self._spellings = []
+        self._folded = {}
+
+    def _term_id(self, folded, spelling):
+        term = self._ids.get(folded)
+        if term is None:
+            term = self._ids[folded] = len(self._spellings)
+            self._spellings.append(Counter())
+        self._spellings[term][spelling] += 1
+        return term
+
+    def _fold(self, word):
+        folded = self._folded.get(word)
+        if folded is None:
+            folded = self._folded[word] = fold_accents(word)
+        return folded
+
+    def terms_of(self, text):
+        """Códigos dos termos de um texto, com repetição
+
+        Expressões não começam nem terminam em palavra vazia, então
+        "pix não encontrado" é um termo e "não encontrado" não é.
+        """
+        words = tokenize(text)
+        folded = [self._fold(word) for word in words]
+        useful = [len(word) > 1 and not word.isdigit() and word not in self.stopwords for word in folded]
+        terms = []
+        for size in range(1, self.max_ngram + 1):
+            for start in range(len(words) - size + 1):
+                end = start + size - 1
+                if useful[start] and useful[end]:
+                    terms.append(self._term_id(' '.join(folded[start:end + 1]), ' '.join(words[start:end + 1])))
+        return terms
+
+    def count(self, field_code, texts, categoria_codes, date_codes):
+        """Ocorrências de cada termo por (categoria, dia) para uma coluna de textos"""
+        text_codes, uniques = pd.factorize(texts)
+
+        # Reclamações com o mesmo texto, categoria e dia são contadas juntas
+        keys = pd.DataFrame({'categoria': categoria_codes, 'data': date_codes, 'texto': text_codes})
+        keys = keys[(keys['categoria'] >= 0) & (keys['data'] >= 0) & (keys['texto'] >= 0)]
+        groups = keys.groupby(['categoria', 'data', 'texto'], sort=False).size()
+        categoria = groups.index.get_level_values('categoria').to_numpy(np.int32)
+        data = groups.index.get_level_values('data').to_numpy(np.int32)
+        texto = groups.index.get_level_values('texto').to_numpy(np.int64)
+
+        # Termos de cada texto distinto, concatenados: texto i ocupa flat[offsets[i]:offsets[i + 1]]
+        per_text = [self.terms_of(str(text)) for text in uniques]
+        lengths = np.fromiter((len(terms) for terms in per_text), dtype=np.int64, count=len(per_text))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        flat = np.fromiter((term for terms in per_text for term in terms), dtype=np.int32, count=int(offsets[-1]))
+
+        # Uma linha por (grupo, termo do texto do grupo)
+        repeats = lengths[texto]
+        rows = np.repeat(np.arange(len(texto)), repeats)
+        position = np.arange(len(rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        exploded = pd.DataFrame({
+            'categoria': categoria[rows],
+            'data': data[rows],
+            'term': flat[offsets[texto[rows]] + position],
+            'count': groups.to_numpy(np.int64)[rows],
+        })
+        summed = exploded.groupby(['categoria', 'data', 'term'], sort=False)['count'].sum()
+        return {
+            'field': np.full(len(summed), field_code, dtype=np.int8),
+            'categoria': summed.index.get_level_values('categoria').to_numpy(np.int32),
+            'data': summed.index.get_level_values('data').to_numpy(np.int32),
+            'term': summed.index.get_level_values('term').to_numpy(np.int32),
+            'count': summed.to_numpy(np.int64),
+        }
+
+    def vocabulary(self):
+        """Grafia exibida (a mais comum) e tamanho em palavras de cada termo"""
+        terms = np.array([spellings.most_common(1)[0][0] for spellings in self._spellings], dtype=object)
+        sizes = np.fromiter((term.count(' ') + 1 for term in terms), dtype=np.int8, count=len(terms))
+        return terms, sizes
@@ -0,0 +1,20 @@
+import unicodedata
+
+# Caracteres latinos acentuados mapeados direto para a letra base (caminho rápido do português)
+_LATIN_FOLD = {}
+for _codepoint in range(0xC0, 0x250):
+    _base = ''.join(char for char in unicodedata.normalize('NFKD', chr(_codepoint))
+                    if not unicodedata.combining(char))
+    if _base != chr(_codepoint) and _base.isascii():
+        _LATIN_FOLD[_codepoint] = _base
+
+
+def fold_accents(text):
+    """Remove acentos e cedilhas ("situação" -> "situacao")"""
+    if text.isascii():
+        return text
+    folded = text.translate(_LATIN_FOLD)
+    if folded.isascii():
+        return folded
+    normalized = unicodedata.normalize('NFKD', folded)
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
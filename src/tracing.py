@@ -0,0 +1,131 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Com o OpenTelemetry instalado (ex: aws-opentelemetry-distro no contêiner do AgentCore),
+# cada etapa também vira um span exportado; sem ele, só as medições locais são feitas
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:
+    _otel_trace = None
+
+_tracer = _otel_trace.get_tracer('desafio_agentcore') if _otel_trace else None
+
+# Limites (segundos) dos buckets dos histogramas de duração
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Etapas registradas na requisição atual (só quando alguém pediu as medições)
+_timings = contextvars.ContextVar('tracing_timings', default=None)
+_depth = contextvars.ContextVar('tracing_depth', default=0)
+
+
+class Histogram:
+    """Histograma cumulativo por etapa, no formato do Prometheus"""
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            series = self._series.get(stage)
+            if series is None:
+                series = self._series[stage] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for index, limit in enumerate(self.buckets):
+                if seconds <= limit:
+                    counts[index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def snapshot(self):
+        """{etapa: (contagens cumulativas por bucket, soma em segundos, total de observações)}"""
+        with self._lock:
+            return {stage: (list(counts), total, count) for stage, (counts, total, count) in self._series.items()}
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for stage, (counts, total, count) in sorted(self.snapshot().items()):
+            for limit, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{stage="{stage}",le="{limit}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+# Duração de cada etapa, acumulada pelo processo
+stage_durations = Histogram('agente_etapa_duracao_segundos', 'Duração das etapas do agente em segundos')
+
+
+def _otel_attributes(attributes):
+    """Atributos como tipos simples, aceitos pelo OpenTelemetry e serializáveis em JSON"""
+    return {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in attributes.items()}
+
+
+def record(name, seconds):
+    """Registra uma etapa já medida (ex: trechos de um gerador, onde `span` não se aplica)"""
+    stage_durations.observe(name, seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append({'span': name, 'ms': round(seconds * 1000, 2), 'depth': _depth.get()})
+
+
+@contextmanager
+def span(name, **attributes):
+    """Mede uma etapa: histograma do processo, medições da requisição e span do OpenTelemetry"""
+    attributes = _otel_attributes(attributes)
+    timings = _timings.get()
+    depth = _depth.get()
+    entry = None
+    if timings is not None:
+        # Entrada criada no início: a lista fica na ordem em que as etapas começaram
+        entry = {'span': name, 'ms': None, 'depth': depth, **attributes}
+        timings.append(entry)
+
+    token = _depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        if _tracer is None:
+            yield
+        else:
+            with _tracer.start_as_current_span(name, attributes=attributes):
+                yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _depth.reset(token)
+        stage_durations.observe(name, elapsed)
+        if entry is not None:
+            entry['ms'] = round(elapsed * 1000, 2)
+
+
+def traced(name):
+    """Decorador: executa a função dentro de `span(name)`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def collect_timings(enabled=True):
+    """Guarda as etapas executadas no bloco; produz a lista de medições (ou None se desativado)"""
+    if not enabled:
+        yield None
+        return
+    timings = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
@@ -4,16 +4,33 @@
 Servidor Flask com interface de chat
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import sys
 import os
 
-from src.my_agent import invoke
+from src.my_agent import invoke, invoke_stream, detect_analysis_request
+from src.chat_api import (METRICS_CONTENT_TYPE, chat_payload, email_status_body, format_agent_response,
+                          job_accepted, job_status_body, metrics_text, sse_event, stats_body)
+from src.report_jobs import QueueFullError, create_job_manager
 
 app = Flask(__name__)
 CORS(app)
 
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Relatórios rodam em segundo plano para não prender a conexão do chat
+report_jobs = create_job_manager(invoke)
+
+def submit_report(payload):
+    """Agenda o relatório e responde imediatamente com o id do job"""
+    try:
+        job_id = report_jobs.submit(payload)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    
+    return jsonify(job_accepted(job_id)), 202
+
 @app.route('/')
 def index():
     """Página principal do chat"""
@@ -23,9 +40,9 @@ def index():
 def download_pdf(filename):
     """Endpoint para download de PDFs"""
     try:
-        pdf_path = os.path.join('results', filename)
+        pdf_path = os.path.join(RESULTS_DIR, os.path.basename(filename))
         if os.path.exists(pdf_path):
-            return send_file(pdf_path, as_attachment=True)
+            return send_from_directory(RESULTS_DIR, os.path.basename(filename), as_attachment=True)
         else:
             return jsonify({'error': 'Arquivo não encontrado'}), 404
     except Exception as e:
@@ -41,37 +58,83 @@ def chat():
         if not user_message:
             return jsonify({'error': 'Mensagem vazia'}), 400
         
+        payload = chat_payload(data)
+        
+        # Pedidos de relatório viram jobs; perguntas são respondidas na hora
+        is_analysis_request, _ = detect_analysis_request(user_message, data.get('email'))
+        if is_analysis_request:
+            return submit_report(payload)
+        
         # Chamar o agente de IA
-        payload = {"prompt": user_message}
         response = invoke(payload)
-        
-        # Processar resposta
-        if response.get('status') == 'conversational':
-            return jsonify({
-                'response': response.get('response'),
-                'type': 'conversational'
-            })
-        elif response.get('status') == 'success':
-            result = {
-                'response': response.get('ai_insights', 'Análise concluída!'),
-                'type': 'analysis',
-                'pdf_filename': response.get('pdf_filename'),
-                'email_sent': response.get('email_sent', False)
-            }
-            
-            if response.get('email_message'):
-                result['email_message'] = response.get('email_message')
-                
-            return jsonify(result)
-        else:
-            return jsonify({
-                'response': f"Erro: {response.get('result', 'Erro desconhecido')}",
-                'type': 'error'
-            })
+        return jsonify(format_agent_response(response))
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Chat em streaming: a resposta chega como eventos SSE conforme é gerada"""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')
+    
+    if not user_message:
+        return jsonify({'error': 'Mensagem vazia'}), 400
+    
+    payload = chat_payload(data)
+    
+    # Relatórios continuam como jobs (resposta JSON com o id)
+    is_analysis_request, _ = detect_analysis_request(user_message, data.get('email'))
+    if is_analysis_request:
+        return submit_report(payload)
+    
+    def generate():
+        try:
+            for text in invoke_stream(payload):
+                yield sse_event({'text': text})
+            yield sse_event({'type': 'conversational'}, event='done')
+        except Exception as e:
+            yield sse_event({'error': str(e)}, event='error')
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/reports', methods=['POST'])
+def create_report():
+    """Agenda a geração de um relatório completo"""
+    data = request.get_json(silent=True) or {}
+    payload = {"prompt": data.get('message') or "Analisar reclamações e gerar relatório"}
+    if data.get('email'):
+        payload["email"] = data['email']
+    return submit_report(payload)
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Status, progresso e, ao final, o resultado de um relatório"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    
+    return jsonify(job_status_body(job))
+
+@app.route('/api/stats')
+def cache_stats():
+    """Caminho que atendeu cada pergunta, acertos dos caches e tamanho dos prompts"""
+    return jsonify(stats_body())
+
+@app.route('/metrics')
+def metrics():
+    """Histogramas de duração das etapas no formato do Prometheus"""
+    return Response(metrics_text(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/emails/<delivery_id>')
+def email_status(delivery_id):
+    """Status da entrega de um e-mail de relatório"""
+    body = email_status_body(delivery_id)
+    if body is None:
+        return jsonify({'error': 'Envio não encontrado'}), 404
+    return jsonify(body)
+
 if __name__ == '__main__':
     print("🌐 INICIANDO FRONTEND WEB - AGENTE IA SICREDI")
     print("=" * 50)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+🌐 Frontend Web para o Agente de IA (modo assíncrono)
+Servidor ASGI (Starlette + uvicorn) com a mesma interface e API do web_chat.py
+
+Perguntas esperam pelo Bedrock como corrotinas, então um processo atende
+centenas de sessões simultâneas sem uma thread presa por conversa; a carga
+dos dados roda no executor de análise e os PDFs são enviados em streaming.
+
+Uso: uvicorn web_chat_asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import os
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.my_agent import detect_analysis_request, invoke, invoke_async, invoke_stream_async
+from src.chat_api import (METRICS_CONTENT_TYPE, chat_payload, email_status_body, format_agent_response,
+                          job_accepted, job_status_body, metrics_text, sse_event, stats_body)
+from src.report_jobs import QueueFullError, create_job_manager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, 'results')
+CHAT_PAGE = os.path.join(BASE_DIR, 'templates', 'chat.html')
+
+# Relatórios rodam em segundo plano para não prender a conexão do chat
+report_jobs = create_job_manager(invoke)
+
+
+async def read_json(request):
+    """Corpo JSON da requisição, ou {} se vazio ou inválido"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def submit_report(payload):
+    """Agenda o relatório e responde imediatamente com o id do job"""
+    try:
+        job_id = report_jobs.submit(payload)
+    except QueueFullError as e:
+        return JSONResponse({'error': str(e)}, status_code=429)
+    return JSONResponse(job_accepted(job_id), status_code=202)
+
+
+async def index(request):
+    """Página principal do chat"""
+    return FileResponse(CHAT_PAGE, media_type='text/html')
+
+
+async def download_pdf(request):
+    """Download de PDFs, lidos e enviados em blocos sem bloquear o event loop"""
+    filename = os.path.basename(request.path_params['filename'])
+    pdf_path = os.path.join(RESULTS_DIR, filename)
+    if not os.path.exists(pdf_path):
+        return JSONResponse({'error': 'Arquivo não encontrado'}, status_code=404)
+    return FileResponse(pdf_path, media_type='application/pdf', filename=filename)
+
+
+async def chat(request):
+    """API endpoint para chat com o agente"""
+    try:
+        data = await read_json(request)
+        user_message = data.get('message', '')
+
+        if not user_message:
+            return JSONResponse({'error': 'Mensagem vazia'}, status_code=400)
+
+        payload = chat_payload(data)
+
+        # Pedidos de relatório viram jobs; perguntas são respondidas na hora
+        is_analysis_request, _ = detect_analysis_request(user_message, data.get('email'))
+        if is_analysis_request:
+            return submit_report(payload)
+
+        response = await invoke_async(payload)
+        return JSONResponse(format_agent_response(response))
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def chat_stream(request):
+    """Chat em streaming: a resposta chega como eventos SSE conforme é gerada"""
+    data = await read_json(request)
+    user_message = data.get('message', '')
+
+    if not user_message:
+        return JSONResponse({'error': 'Mensagem vazia'}, status_code=400)
+
+    payload = chat_payload(data)
+
+    # Relatórios continuam como jobs (resposta JSON com o id)
+    is_analysis_request, _ = detect_analysis_request(user_message, data.get('email'))
+    if is_analysis_request:
+        return submit_report(payload)
+
+    async def generate():
+        try:
+            async for text in invoke_stream_async(payload):
+                yield sse_event({'text': text})
+            yield sse_event({'type': 'conversational'}, event='done')
+        except Exception as e:
+            yield sse_event({'error': str(e)}, event='error')
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def create_report(request):
+    """Agenda a geração de um relatório completo"""
+    data = await read_json(request)
+    payload = {"prompt": data.get('message') or "Analisar reclamações e gerar relatório"}
+    if data.get('email'):
+        payload["email"] = data['email']
+    return submit_report(payload)
+
+
+async def job_status(request):
+    """Status, progresso e, ao final, o resultado de um relatório"""
+    job = report_jobs.get(request.path_params['job_id'])
+    if job is None:
+        return JSONResponse({'error': 'Job não encontrado'}, status_code=404)
+    return JSONResponse(job_status_body(job))
+
+
+async def cache_stats(request):
+    """Caminho que atendeu cada pergunta, acertos dos caches e tamanho dos prompts"""
+    return JSONResponse(stats_body())
+
+
+async def metrics(request):
+    """Histogramas de duração das etapas no formato do Prometheus"""
+    return Response(metrics_text(), headers={'Content-Type': METRICS_CONTENT_TYPE})
+
+
+async def email_status(request):
+    """Status da entrega de um e-mail de relatório"""
+    body = email_status_body(request.path_params['delivery_id'])
+    if body is None:
+        return JSONResponse({'error': 'Envio não encontrado'}, status_code=404)
+    return JSONResponse(body)
+
+
+routes = [
+    Route('/', index),
+    Route('/download/{filename}', download_pdf),
+    Route('/api/chat', chat, methods=['POST']),
+    Route('/api/chat/stream', chat_stream, methods=['POST']),
+    Route('/api/reports', create_report, methods=['POST']),
+    Route('/api/jobs/{job_id}', job_status),
+    Route('/api/stats', cache_stats),
+    Route('/api/emails/{delivery_id}', email_status),
+    Route('/metrics', metrics),
+]
+
+app = Starlette(routes=routes, middleware=[
+    Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+])
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🌐 INICIANDO FRONTEND WEB (ASGI) - AGENTE IA SICREDI")
+    print("=" * 50)
+    print("🚀 Servidor iniciando em: http://localhost:5000")
+    print("💬 Interface de chat disponível no navegador")
+    print("🤖 Agente de IA integrado")
+    print("-" * 50)
+
+    uvicorn.run(app, host='0.0.0.0', port=5000)